@@ -1,9 +1,37 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker, declarative_base
+from common.metrics import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./auth.db")
+# A sync endpoint that only reads keeps its connection until the response has been
+# validated, which needs a threadpool thread again; with fewer connections than
+# threadpool threads (40) every thread can end up waiting on the pool.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def make_engine(url: str):
+    # in-memory SQLite (tests): one shared connection, or every thread would see its own empty database
+    pool_kwargs = {"poolclass": StaticPool} if ":memory:" in url else {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW}
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **pool_kwargs)
+    instrument_engine(engine, "auth")
+    return engine
+
+class Database:
+    # The engine and session factory of one app: create_app() builds its own, so
+    # several apps in one process (tests) each talk to their own database.
+    # Creating the engine does not connect; the first session does.
+    def __init__(self, url: str = SQLALCHEMY_DATABASE_URL):
+        self.url = url
+        self.engine = make_engine(url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+# The environment's database, for scripts and `python -m auth_service.migrate`;
+# apps get their own Database from create_app()
+default = Database()
+engine, SessionLocal = default.engine, default.SessionLocal
 Base = declarative_base()
@@ -1,49 +1,149 @@
+import json
 import os
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from auth_service.db import Base, engine, SessionLocal
-from auth_service import models, schemas, utils
-from common.security import create_access_token
-from typing import List
+from auth_service import db as auth_db
+from auth_service.migrate import migrate
+from auth_service import models, schemas, tokens, utils
+from common import metrics, responses
+from common.deps import require_role
+from common.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate, set_next_cursor
+from common.settings import Settings
+from typing import List, Optional
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Auth Service")
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "1000"))
 
-origins = os.getenv("CORS_ORIGINS", "*")
-allow_origins = ["*"] if origins == "*" else [o.strip() for o in origins.split(",") if o.strip()]
-app.add_middleware(CORSMiddleware, allow_origins=allow_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if app.state.settings.migrate:
+        await run_in_threadpool(migrate, app.state.db.engine)
+    yield
+    utils.shutdown_pool()
+    app.state.db.dispose()
+
+# The schema is not created here: run `python -m auth_service.migrate` (run_auth.py does) or pass migrate=True
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    app = FastAPI(title="Auth Service", lifespan=lifespan)
+    app.state.settings = settings
+    # per app, so apps built in one process share nothing
+    app.state.db = auth_db.Database(settings.database_url or auth_db.SQLALCHEMY_DATABASE_URL)
+    app.state.revocations = tokens.RevocationStore()
+    app.add_middleware(CORSMiddleware, allow_origins=settings.cors_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=[NEXT_CURSOR_HEADER])
+    metrics.install(app, "auth", settings.metrics)
+    app.include_router(router)
+    return app
+
+def __getattr__(name):
+    # `auth_service.main:app` (older entry points and scripts): built on first access
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_session_factory(request: Request):
+    return request.app.state.db.SessionLocal
+
+def get_revocations(request: Request) -> tokens.RevocationStore:
+    return request.app.state.revocations
+
+def get_db(session_factory=Depends(get_session_factory)):
+    db = session_factory()
     try:
         yield db
     finally:
         db.close()
 
-@app.post("/auth/login", response_model=schemas.TokenOut)
-def login(body: schemas.LoginIn, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == body.email).first()
-    if not user or not utils.verify_password(body.password, user.password_hash):
+def find_user(db: Session, email: str):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    db.close()  # hand the connection back before the slow hash check; `user` stays readable
+    return user
+
+def save_hash(db: Session, user_id: int, password_hash: str):
+    db.execute(update(models.User).where(models.User.id == user_id).values(password_hash=password_hash))
+    db.commit()
+
+# Hashing runs in the process pool (utils.*_async); only the short queries use the threadpool
+@router.post("/auth/login", response_model=schemas.TokenOut)
+async def login(body: schemas.LoginIn, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, body.email)
+    hashed = user.password_hash if user else await utils.dummy_hash()
+    if not await utils.verify_password_async(body.password, hashed) or not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = create_access_token(sub=user.email, role=user.role)
-    return {"access_token": token}
+    if utils.needs_rehash(user.password_hash):
+        # legacy SHA-256 or an older cost setting: upgrade while we have the plain password
+        await run_in_threadpool(save_hash, db, user.id, await utils.hash_password_async(body.password))
+    return tokens.issue(user.email, user.role, user.id)
 
-@app.post("/users", response_model=schemas.UserOut)
-def create_user(body: schemas.UserCreate, db: Session = Depends(get_db)):
-    exists = db.query(models.User).filter(models.User.email == body.email).first()
+# New access + refresh token for a refresh token; each refresh token works once
+@router.post("/auth/refresh", response_model=schemas.TokenOut)
+def refresh(body: schemas.RefreshIn, db: Session = Depends(get_db), store: tokens.RevocationStore = Depends(get_revocations)):
+    try:
+        return tokens.rotate(store, db, body.refresh_token)
+    except tokens.RefreshRejected as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+@router.post("/auth/logout")
+def logout(body: schemas.RefreshIn, db: Session = Depends(get_db), store: tokens.RevocationStore = Depends(get_revocations)):
+    try:
+        tokens.logout(store, db, body.refresh_token)
+    except tokens.RefreshRejected as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    return {"ok": True}
+
+@router.post("/users", response_model=schemas.UserOut)
+async def create_user(body: schemas.UserCreate, db: Session = Depends(get_db)):
+    exists = await run_in_threadpool(find_user, db, body.email)
     if exists:
         raise HTTPException(status_code=400, detail="Email already used")
-    u = models.User(email=body.email, password_hash=utils.hash_password(body.password), role=body.role)
-    db.add(u)
-    db.commit()
-    db.refresh(u)
+    u = models.User(email=body.email, password_hash=await utils.hash_password_async(body.password), role=body.role)
+
+    def save():
+        db.add(u)
+        db.commit()
+        db.refresh(u)
+    await run_in_threadpool(save)
     return u
 
-@app.get("/users", response_model=List[schemas.UserOut])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(models.User).all()
+# Keyset pages by id; the next page's cursor comes back in X-Next-Cursor
+@router.get("/users", response_model=List[schemas.UserOut])
+def list_users(response: Response, page: int = Query(1, ge=1),
+               items_per_page: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+               cursor: Optional[str] = None, db: Session = Depends(get_db), user=Depends(require_role("admin"))):
+    if responses.FAST_JSON:
+        # column tuples straight to JSON (common.responses), no ORM objects or per-row validation
+        query = select(models.User.id, models.User.email, models.User.role)
+        rows = db.execute(paginate(query, models.User.id, cursor, page, items_per_page)).all()
+        response = Response(content=responses.rows_json(rows), media_type="application/json")
+        set_next_cursor(response, rows, items_per_page)
+        return response
+    rows = db.scalars(paginate(select(models.User), models.User.id, cursor, page, items_per_page)).all()
+    set_next_cursor(response, rows, items_per_page)
+    return rows
+
+# Every user as NDJSON, one line per user. Rows are fetched EXPORT_BATCH at a time
+# and written as they arrive, so memory stays flat however big the table is.
+def export_lines(session_factory):
+    with session_factory() as db:
+        result = db.execute(
+            select(models.User.id, models.User.email, models.User.role)
+            .order_by(models.User.id)
+            .execution_options(yield_per=EXPORT_BATCH)
+        )
+        for rows in result.partitions():
+            yield "".join(json.dumps({"id": r.id, "email": r.email, "role": r.role}) + "\n" for r in rows)
+
+@router.get("/users/export")
+def export_users(session_factory=Depends(get_session_factory), user=Depends(require_role("admin"))):
+    return StreamingResponse(export_lines(session_factory), media_type="application/x-ndjson")
 
-@app.get("/health")
+@router.get("/health")
 def health():
     return {"ok": True}
@@ -0,0 +1,12 @@
+from auth_service import db, models  # noqa: F401  (models registers the tables)
+
+# Schema management for the auth database, run before the service starts
+# (run_auth.py does it by default, or `python -m auth_service.migrate`), not at
+# import time. Safe to re-run; it only creates what is missing.
+
+def migrate(bind=None) -> None:
+    db.Base.metadata.create_all(bind=bind or db.engine)
+
+if __name__ == "__main__":
+    migrate()
+    print("Auth DB migrated!")
@@ -7,3 +7,9 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     role = Column(String, nullable=False)  # admin | owner-event | client
+
+# Used refresh token ids and revoked token families, kept until the token would have expired
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    id = Column(String, primary_key=True)  # "jti:<id>" or "fam:<id>"
+    expires_at = Column(Integer, nullable=False, index=True)
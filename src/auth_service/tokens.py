@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from auth_service import models
+from common.security import REFRESH_TOKEN_DAYS, TokenError, create_access_token, create_refresh_token, verify_token
+
+# Refresh token rotation.
+# Each refresh token can be used once: using it records its jti in revoked_tokens
+# (the primary key makes that atomic across workers) and hands out a new token of
+# the same family. A second use of the same token means it leaked, so the whole
+# family is revoked and the holder has to log in again.
+#
+# Revoked ids are also kept in memory, so replays and logged-out families are
+# refused without a query; the table stays authoritative for other workers.
+# Rows are pruned once the token they refer to has expired.
+
+PRUNE_SECONDS = float(os.getenv("REVOCATION_PRUNE_SECONDS", "300"))
+
+class RefreshRejected(Exception): ...
+
+class RevocationStore:
+    def __init__(self):
+        self._revoked: Dict[str, int] = {}  # id -> expires_at
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def _known(self, *ids: str) -> bool:
+        with self._lock:
+            return any(i in self._revoked for i in ids)
+
+    def _remember(self, id_: str, expires_at: int) -> None:
+        with self._lock:
+            self._revoked[id_] = expires_at
+
+    def is_revoked(self, db: Session, *ids: str) -> bool:
+        if self._known(*ids):
+            return True
+        return db.scalar(select(models.RevokedToken.id).where(models.RevokedToken.id.in_(ids))) is not None
+
+    def revoke(self, db: Session, id_: str, expires_at: int) -> bool:
+        # False when the id was already revoked (by us or another worker)
+        try:
+            db.execute(insert(models.RevokedToken).values(id=id_, expires_at=expires_at))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        finally:
+            self._remember(id_, expires_at)
+        return True
+
+    def prune(self, db: Session) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + PRUNE_SECONDS
+        cutoff = int(time.time())
+        db.execute(delete(models.RevokedToken).where(models.RevokedToken.expires_at < cutoff))
+        db.commit()
+        with self._lock:
+            self._revoked = {k: v for k, v in self._revoked.items() if v >= cutoff}
+
+def issue(sub: str, role: str, uid: int, family: Optional[str] = None) -> dict:
+    return {
+        "access_token": create_access_token(sub=sub, role=role, uid=uid),
+        "refresh_token": create_refresh_token(sub=sub, role=role, family=family, uid=uid),
+    }
+
+def _claims(token: str) -> dict:
+    try:
+        return verify_token(token, typ="refresh")
+    except TokenError as e:
+        raise RefreshRejected(str(e))
+
+def _family_expiry() -> int:
+    # a family outlives each of its tokens: the last rotation may have just issued a fresh one
+    return int(time.time()) + REFRESH_TOKEN_DAYS * 86400
+
+# No password check and no user lookup: the refresh token carries sub and role
+def rotate(store: RevocationStore, db: Session, refresh_token: str) -> dict:
+    claims = _claims(refresh_token)
+    jti, fam, exp = "jti:" + claims["jti"], "fam:" + claims["fam"], int(claims["exp"])
+    store.prune(db)
+    if store.is_revoked(db, fam):
+        raise RefreshRejected("Session revoked")
+    if not store.revoke(db, jti, exp):
+        store.revoke(db, fam, _family_expiry())  # reuse of a rotated token: end the whole session
+        raise RefreshRejected("Refresh token reused")
+    uid = claims.get("uid")
+    if uid is None:
+        # refresh tokens issued before tokens carried the user id
+        uid = db.scalar(select(models.User.id).where(models.User.email == claims["sub"]))
+        if uid is None:
+            raise RefreshRejected("Unknown user")
+    return issue(claims["sub"], claims["role"], uid, claims["fam"])
+
+def logout(store: RevocationStore, db: Session, refresh_token: str) -> None:
+    claims = _claims(refresh_token)
+    store.revoke(db, "fam:" + claims["fam"], _family_expiry())
@@ -1,7 +1,106 @@
+import asyncio
+import base64
 import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
-def hash_password(raw: str) -> str:
-    return hashlib.sha256(raw.encode()).hexdigest()
+# Password hashing: salted scrypt (default) or PBKDF2-SHA256, with the cost stored in
+# the hash so it can be raised later without breaking existing passwords:
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>
+#   pbkdf2_sha256$<iterations>$<salt>$<hash>
+# Old rows hold a bare SHA-256 hex digest; they still verify and are rehashed on the
+# next successful login (see needs_rehash).
+#
+# The KDF is deliberately slow, so the async helpers run it in a process pool of
+# HASH_WORKERS processes (0 = the default threadpool) and logins scale across cores
+# instead of queueing on the event loop's threadpool.
+
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "scrypt")
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "600000"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+SALT_BYTES = 16
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+def _scrypt(raw: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem: OpenSSL's default (32 MiB) is too small for n >= 2**15
+    return hashlib.scrypt(raw.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20, dklen=32)
+
+def _pbkdf2(raw: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", raw.encode(), salt, iterations)
+
+def hash_password(raw: str, scheme: Optional[str] = None) -> str:
+    scheme = scheme or PASSWORD_SCHEME
+    salt = secrets.token_bytes(SALT_BYTES)
+    if scheme == "scrypt":
+        digest = _scrypt(raw, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    if scheme == "pbkdf2_sha256":
+        digest = _pbkdf2(raw, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"Unknown password scheme {scheme!r}")
 
 def verify_password(raw: str, hashed: str) -> bool:
-    return hash_password(raw) == hashed
+    parts = hashed.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(raw, _unb64(parts[4]), n, r, p)
+            return hmac.compare_digest(digest, _unb64(parts[5]))
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            digest = _pbkdf2(raw, _unb64(parts[2]), int(parts[1]))
+            return hmac.compare_digest(digest, _unb64(parts[3]))
+    except ValueError:
+        return False
+    # legacy: unsalted SHA-256 hex digest
+    return hmac.compare_digest(hashlib.sha256(raw.encode()).hexdigest(), hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    # legacy digests, another scheme, or a cost below the current setting
+    parts = hashed.split("$")
+    if PASSWORD_SCHEME == "scrypt":
+        return parts[:4] != ["scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return parts[:2] != [PASSWORD_SCHEME, str(PBKDF2_ITERATIONS)]
+
+# Verified against when the email is unknown, so a miss costs as much as a wrong password
+_DUMMY_HASH: Optional[str] = None
+
+async def dummy_hash() -> str:
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = await hash_password_async(secrets.token_hex(8))
+    return _DUMMY_HASH
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if HASH_WORKERS <= 0:
+        return None
+    if _pool is None:
+        # spawn: forking a process that already runs threads (threadpool, DB pools) is not safe
+        _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+async def hash_password_async(raw: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), hash_password, raw)
+
+async def verify_password_async(raw: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), verify_password, raw, hashed)
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -1,7 +1,30 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Optional
+from common.metrics import mongo_listener
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.get_database(os.getenv("MONGO_DB", "pos_client"))
-clients = db.get_collection("clients")
+MONGO_DB = os.getenv("MONGO_DB", "pos_client")
+
+class Mongo:
+    # The Mongo client and collections of one app, opened by connect() in its lifespan,
+    # so importing the app opens no Mongo client and apps in one process share nothing
+    def __init__(self, client, db_name: str):
+        self.client = client
+        db = client.get_database(db_name)
+        self.clients = db.get_collection("clients")
+        # one document per ticket instead of an ever-growing `bilete` array on the client
+        self.tickets = db.get_collection("tickets")
+
+    async def ensure_indexes(self):
+        # every profile endpoint looks the client up by email
+        await self.clients.create_index("email", unique=True)
+        await self.tickets.create_index([("email", 1), ("cod", 1)], unique=True)
+        await self.tickets.create_index([("email", 1), ("_id", 1)])  # paginated listing
+
+    def close(self) -> None:
+        self.client.close()
+
+def connect(url: Optional[str] = None, db_name: Optional[str] = None) -> Mongo:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(url or MONGO_URL, event_listeners=[mongo_listener()])
+    return Mongo(client, db_name or MONGO_DB)
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Set
+import httpx
+from common.metrics import httpx_hooks
+from common.security import create_access_token
+
+# App-lifetime client for the Event Service.
+# One pooled httpx.AsyncClient (keep-alive, timeouts) is shared by all requests,
+# a circuit breaker fails fast while the event service is down, and concurrent
+# ticket validations are coalesced into a single POST /validate/tickets call.
+
+EVENT_SERVICE_URL = os.getenv("EVENT_SERVICE_URL", "http://localhost:8001")
+HTTP_TIMEOUT = float(os.getenv("EVENT_HTTP_TIMEOUT", "2.0"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("EVENT_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_KEEPALIVE = int(os.getenv("EVENT_HTTP_KEEPALIVE", "20"))
+BREAKER_FAILURES = int(os.getenv("EVENT_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("EVENT_BREAKER_RESET_SECONDS", "10"))
+BATCH_WINDOW_MS = float(os.getenv("VALIDATION_BATCH_WINDOW_MS", "2"))
+BATCH_MAX = int(os.getenv("VALIDATION_BATCH_MAX", "500"))
+SERVICE_TOKEN_MINUTES = 60
+
+class EventServiceUnavailable(Exception): ...
+
+class CircuitBreaker:
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            # half-open: let the next call probe, a failure re-opens for another period
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+class ValidationBatcher:
+    # Requests arriving within BATCH_WINDOW_MS share one bulk call; the same code
+    # asked for by several requests is sent once.
+    def __init__(self, send, window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX):
+        self._send = send
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # the loop only keeps weak references to tasks, so in-flight batches are held here
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def validate(self, code: str) -> bool:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.setdefault(code, []).append(fut)
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        # sends what is pending and waits for every batch in flight
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        try:
+            results = await self._send(list(batch))
+        except Exception as e:
+            for futs in batch.values():
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_exception(e)
+            return
+        for code, futs in batch.items():
+            for fut in futs:
+                if not fut.done():
+                    fut.set_result(results.get(code, False))
+
+class EventServiceClient:
+    def __init__(self, base_url: str = EVENT_SERVICE_URL, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_KEEPALIVE),
+            transport=transport,
+            event_hooks=httpx_hooks(),
+        )
+        self.breaker = CircuitBreaker()
+        self._batcher = ValidationBatcher(self.validate_many)
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+
+    def _auth_header(self) -> Dict[str, str]:
+        # the client service calls the event service as itself, not on behalf of one user,
+        # since a batch mixes codes from many users
+        now = time.monotonic()
+        if self._token is None or now >= self._token_expires:
+            self._token = create_access_token(sub="client-service", role="service", expires_minutes=SERVICE_TOKEN_MINUTES)
+            self._token_expires = now + SERVICE_TOKEN_MINUTES * 60 / 2
+        return {"Authorization": f"Bearer {self._token}"}
+
+    async def validate_many(self, codes: List[str]) -> Dict[str, bool]:
+        if not self.breaker.allow():
+            raise EventServiceUnavailable("Event service unavailable")
+        try:
+            r = await self._http.post("/validate/tickets", json={"codes": codes}, headers=self._auth_header())
+            r.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                self.breaker.failure()
+            raise EventServiceUnavailable("Event service unavailable") from e
+        except httpx.HTTPError as e:
+            self.breaker.failure()
+            raise EventServiceUnavailable("Event service unavailable") from e
+        self.breaker.success()
+        return r.json()["results"]
+
+    async def validate(self, code: str) -> bool:
+        return await self._batcher.validate(code)
+
+    async def aclose(self) -> None:
+        await self._batcher.drain()
+        await self._http.aclose()
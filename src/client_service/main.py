@@ -1,24 +1,50 @@
-import os
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from bson import ObjectId
-import httpx
-from client_service.db import clients
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from client_service import db as mongo
+from client_service.event_client import EVENT_SERVICE_URL, EventServiceClient, EventServiceUnavailable
 from client_service.schemas import ClientCreate, ClientOut, AddTicketIn
+from common import metrics, responses
 from common.deps import get_current_user
+from common.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from common.settings import Settings
 
-EVENT_SERVICE_URL = os.getenv("EVENT_SERVICE_URL", "http://localhost:8001")
+router = APIRouter()
 
-app = FastAPI(title="Client Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    app.state.mongo = mongo.connect(settings.mongo_url, settings.mongo_db)
+    await app.state.mongo.ensure_indexes()
+    app.state.event_client = EventServiceClient(settings.event_service_url or EVENT_SERVICE_URL)
+    yield
+    await app.state.event_client.aclose()
+    app.state.mongo.close()
 
-origins = os.getenv("CORS_ORIGINS", "*")
-allow_origins = ["*"] if origins == "*" else [o.strip() for o in origins.split(",") if o.strip()]
-app.add_middleware(CORSMiddleware, allow_origins=allow_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    app = FastAPI(title="Client Service", lifespan=lifespan)
+    app.state.settings = settings
+    app.add_middleware(CORSMiddleware, allow_origins=settings.cors_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=[NEXT_CURSOR_HEADER])
+    metrics.install(app, "client", settings.metrics)
+    app.include_router(router)
+    return app
+
+def __getattr__(name):
+    # `client_service.main:app` (older entry points and scripts): built on first access
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 #HATEOAS-ul
 # Informare client despre creare/actualizare profil + unde sunt biletele
-@app.get("/clients")
+@router.get("/clients")
 async def info_clients():
     return {
         "message": "Acest serviciu permite gestiunea profilului și biletelor tale pentru evenimente/pachete.",
@@ -34,51 +60,84 @@ async def info_clients():
 def oid_str(oid):
     return str(oid)
 
-@app.post("/clients/me")
-async def create_or_get_me(body: ClientCreate, user=Depends(get_current_user)):
+def get_event_client(request: Request) -> EventServiceClient:
+    return request.app.state.event_client
+
+def get_mongo(request: Request) -> mongo.Mongo:
+    return request.app.state.mongo
+
+async def validate_code(events: EventServiceClient, code: str) -> bool:
+    try:
+        return await events.validate(code)
+    except EventServiceUnavailable:
+        raise HTTPException(status_code=502, detail="Event service unavailable")
+
+PROFILE_KEYS = ("email", "prenume", "nume", "public", "social")
+PROFILE_FIELDS = dict.fromkeys(PROFILE_KEYS, 1)  # projection: skip everything else stored on the client
+PROFILE_DEFAULTS = dict.fromkeys(PROFILE_KEYS)  # fields missing from older documents come back as null
+
+def json_out(content):
+    # FAST_JSON: these documents only hold JSON types, so skip jsonable_encoder
+    return responses.FastJSONResponse(content) if responses.FAST_JSON else content
+
+def profile_out(doc):
+    # the projection already limits doc to PROFILE_KEYS; merging keeps the key order
+    return json_out({"id": oid_str(doc.pop("_id")), **PROFILE_DEFAULTS, **doc})
+
+@router.post("/clients/me")
+async def create_or_get_me(body: ClientCreate, user=Depends(get_current_user), db: mongo.Mongo = Depends(get_mongo)):
     # user.sub is the email from token; ensure match or admin role
     if user["role"] != "admin" and user["sub"] != body.email:
         raise HTTPException(status_code=403, detail="Email mismatch")
-    doc = await clients.find_one({"email": body.email})
-    if doc:
-        return {"id": oid_str(doc["_id"]), **{k: doc.get(k) for k in ["email","prenume","nume","public","social"]}}
-    res = await clients.insert_one(body.model_dump())
-    created = await clients.find_one({"_id": res.inserted_id})
-    return {"id": oid_str(created["_id"]), **{k: created.get(k) for k in ["email","prenume","nume","public","social"]}}
-
-@app.get("/clients/me")
-async def get_me(user=Depends(get_current_user)):
-    doc = await clients.find_one({"email": user["sub"]})
+    # creează doar dacă nu există, într-un singur round-trip
+    doc = await db.clients.find_one_and_update(
+        {"email": body.email}, {"$setOnInsert": body.model_dump()},
+        projection=PROFILE_FIELDS, upsert=True, return_document=ReturnDocument.AFTER)
+    return profile_out(doc)
+
+@router.get("/clients/me")
+async def get_me(user=Depends(get_current_user), db: mongo.Mongo = Depends(get_mongo)):
+    doc = await db.clients.find_one({"email": user["sub"]}, PROFILE_FIELDS)
     if not doc:
         raise HTTPException(status_code=404, detail="Client not found")
-    return {"id": oid_str(doc["_id"]), **{k: doc.get(k) for k in ["email","prenume","nume","public","social"]}}
+    return profile_out(doc)
 
-@app.put("/clients/me")
-async def update_me(body: ClientCreate, user=Depends(get_current_user)):
+@router.put("/clients/me")
+async def update_me(body: ClientCreate, user=Depends(get_current_user), db: mongo.Mongo = Depends(get_mongo)):
     if user["sub"] != body.email:
         raise HTTPException(status_code=403, detail="Email mismatch")
-    await clients.update_one({"email": body.email}, {"$set": body.model_dump()}, upsert=True)
-    doc = await clients.find_one({"email": body.email})
-    return {"id": oid_str(doc["_id"]), **{k: doc.get(k) for k in ["email","prenume","nume","public","social"]}}
+    doc = await db.clients.find_one_and_update(
+        {"email": body.email}, {"$set": body.model_dump()},
+        projection=PROFILE_FIELDS, upsert=True, return_document=ReturnDocument.AFTER)
+    return profile_out(doc)
 
-@app.get("/clients/me/tickets")
-async def my_tickets(user=Depends(get_current_user)):
-    doc = await clients.find_one({"email": user["sub"]})
-    if not doc:
-        return {"bilete": []}
-    return {"bilete": doc.get("bilete", [])}
+TICKET_FIELDS = {"_id": 0, "cod": 1, "tip": 1, "eveniment": 1, "pachet": 1}
 
-@app.post("/clients/me/tickets")
-async def add_ticket(body: AddTicketIn, user=Depends(get_current_user)):
-    # Chain validation with Event Service
-    async with httpx.AsyncClient() as client:
+# Keyset pages like the event service's lists: the next page's cursor comes back in X-Next-Cursor
+@router.get("/clients/me/tickets")
+async def my_tickets(response: Response, items_per_page: int = Query(50, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                     user=Depends(get_current_user), db: mongo.Mongo = Depends(get_mongo)):
+    # keyset pe _id, folosește indexul (email, _id)
+    query = {"email": user["sub"]}
+    if cursor:
         try:
-            r = await client.post(f"{EVENT_SERVICE_URL}/validate/ticket", json={"code": body.cod}, headers={"Authorization": f"Bearer dummy"})
-            r.raise_for_status()
-        except Exception:
-            raise HTTPException(status_code=502, detail="Event service unavailable")
-    valid = r.json().get("valid", False)
-    if not valid:
+            query["_id"] = {"$gt": ObjectId(cursor)}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    docs = await db.tickets.find(query, {**TICKET_FIELDS, "_id": 1}).sort("_id", 1).limit(items_per_page).to_list(length=items_per_page)
+    headers = {NEXT_CURSOR_HEADER: str(docs[-1]["_id"])} if len(docs) == items_per_page else None
+    for d in docs:
+        del d["_id"]
+    if responses.FAST_JSON:
+        return responses.FastJSONResponse({"bilete": docs}, headers=headers)
+    response.headers.update(headers or {})
+    return {"bilete": docs}
+
+@router.post("/clients/me/tickets")
+async def add_ticket(body: AddTicketIn, user=Depends(get_current_user), events: EventServiceClient = Depends(get_event_client),
+                     db: mongo.Mongo = Depends(get_mongo)):
+    # Chain validation with Event Service
+    if not await validate_code(events, body.cod):
         raise HTTPException(status_code=400, detail="Ticket invalid")
     ticket_doc = {
         "cod": body.cod,
@@ -86,39 +145,29 @@ async def add_ticket(body: AddTicketIn, user=Depends(get_current_user)):
         "eveniment": {"nume": body.eveniment_nume, "locatie": body.eveniment_locatie} if body.tip == "eveniment" else None,
         "pachet": {"nume": body.pachet_nume} if body.tip == "pachet" else None
     }
-    await clients.update_one({"email": user["sub"]}, {"$push": {"bilete": ticket_doc}}, upsert=True)
+    await db.tickets.update_one({"email": user["sub"], "cod": body.cod}, {"$setOnInsert": ticket_doc}, upsert=True)
     return JSONResponse({"added": True, "cod": body.cod})
 
 # Detalii bilet: re-validează și aduce info eveniment/pachet
-@app.get("/clients/me/tickets/{code}/details")
-async def ticket_details(code: str, user=Depends(get_current_user)):
-    # Caută biletul la client
-    doc = await clients.find_one({"email": user["sub"]})
-    bilete = doc.get("bilete", []) if doc else []
-    bilet = next((b for b in bilete if b["cod"] == code), None)
+@router.get("/clients/me/tickets/{code}/details")
+async def ticket_details(code: str, user=Depends(get_current_user), events: EventServiceClient = Depends(get_event_client),
+                         db: mongo.Mongo = Depends(get_mongo)):
+    # Caută biletul la client (index (email, cod))
+    bilet = await db.tickets.find_one({"email": user["sub"], "cod": code}, TICKET_FIELDS)
     if not bilet:
         raise HTTPException(status_code=404, detail="Ticket not found for client")
     # Chain validare la Event Service
-    async with httpx.AsyncClient() as client:
-        try:
-            r = await client.post(f"{EVENT_SERVICE_URL}/validate/ticket", json={"code": code}, headers={"Authorization": f"Bearer dummy"})
-            r.raise_for_status()
-        except Exception:
-            raise HTTPException(status_code=502, detail="Event service unavailable")
-    valid = r.json().get("valid", False)
-    if not valid:
+    if not await validate_code(events, code):
         raise HTTPException(status_code=400, detail="Ticket invalid")
     # Adaugă detalii despre eveniment/pachet dacă există
     details = {"cod": code, "valid": True, "tip": bilet.get("tip")}
-    async with httpx.AsyncClient() as client:
-        if bilet.get("tip") == "eveniment" and bilet.get("eveniment"):
-            # Exemplu: aduce detalii eveniment (presupunem că avem event_id salvat sau îl obținem din bilet)
-            # Pentru demo, folosim nume și locație din bilet
-            details["eveniment"] = bilet["eveniment"]
-        elif bilet.get("tip") == "pachet" and bilet.get("pachet"):
-            details["pachet"] = bilet["pachet"]
-    return details
-
-@app.get("/health")
+    if bilet.get("tip") == "eveniment" and bilet.get("eveniment"):
+        # Pentru demo, folosim nume și locație din bilet
+        details["eveniment"] = bilet["eveniment"]
+    elif bilet.get("tip") == "pachet" and bilet.get("pachet"):
+        details["pachet"] = bilet["pachet"]
+    return json_out(details)
+
+@router.get("/health")
 def health():
     return {"ok": True}
@@ -0,0 +1,254 @@
+import bisect
+import collections
+import contextvars
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Request timing shared by the three services, exposed in Prometheus text format on /metrics.
+# - http_request_duration_seconds: per route template, method and status
+# - http_request_stage_seconds: how much of each request went to auth, sql, mongo
+#   and outbound http (collected through a context variable while the request runs)
+# - db_query_duration_seconds / mongo_command_duration_seconds / http_client_duration_seconds:
+#   every SQL statement (engine events), Mongo command (pymongo listener) and
+#   outbound httpx call; the histogram _count series are the query counts.
+# Metrics are per process; with several workers scrape each one or sum them.
+#
+# PROFILE_SLOW_MS turns on the sampling profiler: a PROFILE_SAMPLE_RATE share of
+# requests is sampled every PROFILE_INTERVAL_MS, and if one takes longer than
+# PROFILE_SLOW_MS its collapsed stacks (flamegraph.pl / speedscope format) are
+# written to PROFILE_DIR.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+STAGES = ("auth", "sql", "mongo", "http")
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+log = logging.getLogger("metrics")
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f'{self.name}_bucket{{{base}{sep}le="{le}"}} {total}'
+            yield f"{self.name}_sum{{{base}}} {series[-1]}"
+            yield f"{self.name}_count{{{base}}} {total}"
+
+REGISTRY: list = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render() -> bytes:
+    return ("\n".join(line for metric in REGISTRY for line in metric.render()) + "\n").encode()
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("service", "method", "route", "status"))
+STAGE_SECONDS = Histogram("http_request_stage_seconds", "Time per request spent in auth, sql, mongo and outbound http", ("service", "method", "route", "stage"))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements plus Mongo commands per request", ("service", "method", "route"),
+                            buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+DB_SECONDS = Histogram("db_query_duration_seconds", "SQL statement latency", ("db", "statement"), QUERY_BUCKETS)
+MONGO_SECONDS = Histogram("mongo_command_duration_seconds", "Mongo command latency", ("command",), QUERY_BUCKETS)
+HTTP_CLIENT_SECONDS = Histogram("http_client_duration_seconds", "Outbound HTTP call latency", ("host", "method", "status"))
+
+# Per-request accumulator. The dict is shared by reference, so sync endpoints in the
+# threadpool and Motor's executor (both copy the context) add to the same request.
+_stages: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_stages", default=None)
+
+def add_stage(stage: str, seconds: float, queries: int = 0) -> None:
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+        stages["queries"] += queries
+
+@contextmanager
+def stage(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(name, time.perf_counter() - t0)
+
+# SQLAlchemy: time every statement on this engine (pass async_engine.sync_engine for async engines)
+def instrument_engine(sync_engine, db: str) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+        DB_SECONDS.observe((db, statement.lstrip()[:6].upper()), elapsed)
+        add_stage("sql", elapsed, 1)
+
+def mongo_listener():
+    # for MongoClient(event_listeners=[...]); pymongo is imported here so that the
+    # services without Mongo do not load it
+    from pymongo import monitoring
+
+    class MongoCommandListener(monitoring.CommandListener):
+        def started(self, event) -> None:
+            pass
+
+        def succeeded(self, event) -> None:
+            self._record(event)
+
+        def failed(self, event) -> None:
+            self._record(event)
+
+        def _record(self, event) -> None:
+            elapsed = event.duration_micros / 1e6
+            MONGO_SECONDS.observe((event.command_name,), elapsed)
+            add_stage("mongo", elapsed, 1)
+
+    return MongoCommandListener()
+
+# httpx: event_hooks=metrics.httpx_hooks() on an AsyncClient
+def httpx_hooks() -> dict:
+    async def on_request(request):
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    async def on_response(response):
+        start = response.request.extensions.get("metrics_start")
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            HTTP_CLIENT_SECONDS.observe((response.request.url.host, response.request.method, str(response.status_code)), elapsed)
+            add_stage("http", elapsed)
+
+    return {"request": [on_request], "response": [on_response]}
+
+class SamplingProfiler:
+    # Samples the stacks of all threads (the loop thread and the threadpool) while a
+    # chosen request runs. One request is profiled at a time, so concurrent requests
+    # can show up in the same profile.
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._busy = threading.Lock()
+
+    def start(self):
+        if random.random() >= PROFILE_SAMPLE_RATE or not self._busy.acquire(blocking=False):
+            return None
+        stacks: collections.Counter = collections.Counter()
+        stop = threading.Event()
+
+        def run():
+            me = threading.get_ident()
+            while not stop.wait(self.interval):
+                for ident, frame in sys._current_frames().items():
+                    # skip ourselves and idle threads (threadpool workers waiting, the loop in select)
+                    if ident == me or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    stacks[";".join(reversed(stack))] += 1
+
+        thread = threading.Thread(target=run, name="metrics-profiler", daemon=True)
+        thread.start()
+        return stop, thread, stacks
+
+    def finish(self, handle, route: str, elapsed: float) -> None:
+        stop, thread, stacks = handle
+        stop.set()
+        thread.join()
+        self._busy.release()
+        if elapsed * 1000 < PROFILE_SLOW_MS or not stacks:
+            return
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{route.strip('/').replace('/', '_') or 'root'}-{int(elapsed * 1000)}ms.txt"
+        path = os.path.join(PROFILE_DIR, name)
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        log.warning("slow request %s took %.0fms, profile written to %s", route, elapsed * 1000, path)
+
+profiler = SamplingProfiler() if PROFILE_SLOW_MS > 0 else None
+
+class MetricsMiddleware:
+    # Pure ASGI middleware so streaming responses are timed to the last byte
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        stages = {"queries": 0}
+        token = _stages.set(stages)
+        status = 500
+        handle = profiler.start() if profiler else None
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _stages.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")  # template, not the raw path
+            method = scope["method"]
+            REQUEST_SECONDS.observe((self.service, method, route, str(status)), elapsed)
+            REQUEST_QUERIES.observe((self.service, method, route), stages.pop("queries"))
+            for name in STAGES:
+                if name in stages:
+                    STAGE_SECONDS.observe((self.service, method, route, name), stages[name])
+            if handle:
+                profiler.finish(handle, route, elapsed)
+
+def install(app, service: str, enabled: bool = METRICS_ENABLED) -> None:
+    if not enabled:
+        return
+    from fastapi import Response
+
+    app.add_middleware(MetricsMiddleware, service=service)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,53 @@
+import base64
+import json
+import os
+from typing import Optional, Sequence
+from fastapi import HTTPException, Response
+
+# Keyset pagination: pages are "rows with key > last key seen", ordered by key,
+# so every page costs an index seek no matter how deep the client has crawled.
+# The cursor is opaque to clients (base64 of the last key) and is returned in the
+# X-Next-Cursor header so list endpoints keep their plain JSON array bodies.
+
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int, sort_value=None) -> str:
+    data = {"id": last_id} if sort_value is None else {"id": last_id, "k": sort_value}
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        data["id"] = int(data["id"])
+        return data
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(query, key, cursor: Optional[str], page: int, size: int, sort_col=None, descending: bool = False):
+    # Orders by `key`, or by (sort_col, key) when sorting on another indexed column.
+    # `page` is kept for older clients; a cursor always wins over it.
+    order = [key] if sort_col is None else [sort_col.desc() if descending else sort_col, key]
+    query = query.order_by(*order)
+    if not cursor:
+        return query.offset((page - 1) * size).limit(size)
+    last = decode_cursor(cursor)
+    if sort_col is None:
+        return query.where(key > last["id"]).limit(size)
+    if "k" not in last:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    past = sort_col < last["k"] if descending else sort_col > last["k"]
+    return query.where(past | ((sort_col == last["k"]) & (key > last["id"]))).limit(size)
+
+def next_cursor(rows: Sequence, size: int, sort_attr: Optional[str] = None) -> Optional[str]:
+    if len(rows) < size:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.id, getattr(last, sort_attr) if sort_attr else None)
+
+def set_next_cursor(response: Response, rows: Sequence, size: int, sort_attr: Optional[str] = None) -> None:
+    cursor = next_cursor(rows, size, sort_attr)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
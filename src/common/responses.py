@@ -0,0 +1,37 @@
+import json
+import os
+from typing import Any, Sequence
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder does the same job, slower
+    orjson = None
+
+# Lean JSON path for list endpoints, opt-in with FAST_JSON=1.
+# By default a list endpoint loads ORM objects and FastAPI validates each one
+# against the response model before serializing it. With FAST_JSON the endpoints
+# select only the output columns, labelled as the response fields, and the row
+# tuples are dumped straight to JSON bytes: no ORM instances, no per-row model
+# validation. The JSON is the same either way.
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+def rows_json(rows: Sequence) -> bytes:
+    # SQLAlchemy Rows from a column select -> JSON array of objects keyed by column label
+    if not rows:
+        return b"[]"
+    fields = rows[0]._fields
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+class FastJSONResponse(JSONResponse):
+    # For endpoints that return plain dicts/lists (no response_model): skips
+    # jsonable_encoder when returned directly. Endpoints with a response_model are
+    # better off with FastAPI's default class, which serializes through Pydantic.
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
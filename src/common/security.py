@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import hashlib
@@ -5,12 +6,49 @@ import hmac
 import base64
 import json
 import os
+import re
+import threading
+import time
 
 # Minimal JWT-like token using HS256 (python-only, no external deps)
 # NOTE: For production, use PyJWT. This is a compact educational helper.
 
 SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret")
 ALGO = "HS256"
+ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", "60"))
+REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", "14"))
+ADMISSION_WINDOW_SECONDS = int(os.getenv("ADMISSION_WINDOW_SECONDS", "120"))
+
+# Signing key set: JWT_KEYS="2024a:secret1,2024b:secret2". Tokens are signed with
+# JWT_ACTIVE_KID and carry it in their header; every key in the set still verifies,
+# so a new key can be rolled out and the old one dropped once its tokens expired.
+# Without JWT_KEYS tokens are signed with JWT_SECRET and carry no kid. JWT_SECRET
+# keeps verifying those (and kid "default" tokens from earlier builds) after a key set
+# is configured, so the first rotation logs nobody out; JWT_SECRET_RETIRED=1 drops it.
+def _parse_keys(raw: str) -> Dict[str, str]:
+    keys = {}
+    for item in raw.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret
+    return keys
+
+JWT_KEYS = _parse_keys(os.getenv("JWT_KEYS", ""))
+JWT_ACTIVE_KID: Optional[str] = os.getenv("JWT_ACTIVE_KID") or next(iter(JWT_KEYS), None)
+if JWT_ACTIVE_KID is not None and JWT_ACTIVE_KID not in JWT_KEYS:
+    raise RuntimeError(f"JWT_ACTIVE_KID {JWT_ACTIVE_KID!r} is not in JWT_KEYS")
+JWT_SECRET_RETIRED = os.getenv("JWT_SECRET_RETIRED", "0") == "1"
+if JWT_SECRET_RETIRED and not JWT_KEYS:
+    raise RuntimeError("JWT_SECRET_RETIRED needs JWT_KEYS to sign with")
+# separate key for signed codes (tickets, ...) so it can be rotated independently of sessions
+CODE_SECRET = os.getenv("CODE_SECRET", SECRET_KEY)
+CODE_SIG_LEN = 16  # base64url chars kept from the HMAC (96 bits)
+# Code signatures are HMAC(CODE_SECRET, CODE_DOMAIN + value). The label keeps them apart
+# from JWT signatures when CODE_SECRET falls back to JWT_SECRET: a JWT signing input is
+# base64url and never contains ":", so no token signature is ever a valid code signature.
+CODE_DOMAIN = b"ticket-code:"
+CODE_VALUE_RE = re.compile(r"[0-9a-f]{12}")  # what we issue: 12 hex chars
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 0 disables the verified-token cache
 
 def _b64url(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
@@ -19,37 +57,162 @@ def _b64urldecode(data: str) -> bytes:
     padding = "=" * (-len(data) % 4)
     return base64.urlsafe_b64decode(data + padding)
 
+# HMAC state with the key already absorbed, per secret; signing copies it instead
+# of re-deriving the inner/outer pads on every call
+_HMAC_STATES: Dict[str, "hmac.HMAC"] = {}
+
 def _sign(message: bytes, secret: str) -> str:
-    sig = hmac.new(secret.encode(), message, hashlib.sha256).digest()
-    return _b64url(sig)
+    state = _HMAC_STATES.get(secret)
+    if state is None:
+        state = _HMAC_STATES[secret] = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+    h = state.copy()
+    h.update(message)
+    return _b64url(h.digest())
+
+def _header(kid: Optional[str]) -> str:
+    header = {"alg": ALGO, "typ": "JWT"} if kid is None else {"alg": ALGO, "typ": "JWT", "kid": kid}
+    return _b64url(json.dumps(header, separators=(",", ":")).encode())
+
+# encoded header -> secret; headers only differ by kid, so verifying a token is one dict lookup
+_HEADER_SECRETS: Dict[str, str] = {} if JWT_SECRET_RETIRED else {_header(None): SECRET_KEY, _header("default"): SECRET_KEY}
+_HEADER_SECRETS.update({_header(kid): secret for kid, secret in JWT_KEYS.items()})
+
+def _encode(payload: Dict[str, Any]) -> str:
+    h = _header(JWT_ACTIVE_KID)
+    p = _b64url(json.dumps(payload, separators=(",", ":")).encode())
+    msg = f"{h}.{p}".encode()
+    s = _sign(msg, JWT_KEYS[JWT_ACTIVE_KID] if JWT_ACTIVE_KID else SECRET_KEY)
+    return f"{h}.{p}.{s}"
 
-def create_access_token(sub: str, role: str, expires_minutes: int = 60) -> str:
-    header = {"alg": ALGO, "typ": "JWT"}
+# `uid` is the auth service's user id; services use it as a stable owner id
+def create_access_token(sub: str, role: str, expires_minutes: int = ACCESS_TOKEN_MINUTES, uid: Optional[int] = None) -> str:
     payload = {
         "sub": sub,
         "role": role,
         "exp": int((datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)).timestamp())
     }
-    h = _b64url(json.dumps(header, separators=(",", ":")).encode())
-    p = _b64url(json.dumps(payload, separators=(",", ":")).encode())
-    msg = f"{h}.{p}".encode()
-    s = _sign(msg, SECRET_KEY)
-    return f"{h}.{p}.{s}"
+    if uid is not None:
+        payload["uid"] = uid
+    return _encode(payload)
+
+# Refresh tokens carry the same claims plus a token id (jti) and a family id (fam)
+# shared by every token rotated from the same login; the auth service keeps the
+# used/revoked ids.
+def create_refresh_token(sub: str, role: str, family: Optional[str] = None, expires_days: int = REFRESH_TOKEN_DAYS,
+                         uid: Optional[int] = None) -> str:
+    payload = {
+        "sub": sub,
+        "role": role,
+        "typ": "refresh",
+        "jti": _b64url(os.urandom(16)),
+        "fam": family or _b64url(os.urandom(16)),
+        "exp": int((datetime.now(timezone.utc) + timedelta(days=expires_days)).timestamp())
+    }
+    if uid is not None:
+        payload["uid"] = uid
+    return _encode(payload)
+
+# Admission tokens (event service waiting rooms) admit `sub` to one purchase for
+# event `evt`, from `nbf` (their turn in the queue) until `exp`.
+def create_admission_token(sub: str, event_id: int, not_before: float, window_seconds: int = ADMISSION_WINDOW_SECONDS,
+                           jti: Optional[str] = None) -> str:
+    # jti: re-issuing an admission keeps its id, so every copy is spent by the same purchase
+    return _encode({
+        "sub": sub,
+        "typ": "admission",
+        "evt": event_id,
+        "jti": jti or _b64url(os.urandom(16)),
+        "nbf": round(not_before, 3),  # sub-second: slots are often closer than a second apart
+        "exp": int(not_before) + window_seconds
+    })
 
 class TokenError(Exception): ...
 class TokenExpired(TokenError): ...
 class TokenInvalid(TokenError): ...
+class TokenNotYetValid(TokenError):
+    def __init__(self, message: str, not_before: float):
+        super().__init__(message)
+        self.not_before = not_before
+
+class _TokenCache:
+    # LRU of already verified tokens, keyed by a digest of the token; an entry
+    # is dropped once the token's own `exp` has passed
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes, now: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            exp, payload = entry
+            if exp is not None and exp < now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return payload
 
-def verify_token(token: str) -> Dict[str, Any]:
+    def put(self, key: bytes, exp: Optional[int], payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (exp, payload)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+_token_cache = _TokenCache(TOKEN_CACHE_SIZE)
+
+def _verify(token: str) -> Dict[str, Any]:
     try:
         h, p, s = token.split(".")
+        secret = _HEADER_SECRETS.get(h)
+        if secret is None:
+            raise TokenInvalid("Unknown signing key")
         msg = f"{h}.{p}".encode()
-        expected = _sign(msg, SECRET_KEY)
+        expected = _sign(msg, secret)
         if not hmac.compare_digest(s, expected):
             raise TokenInvalid("Invalid signature")
         payload = json.loads(_b64urldecode(p))
-        if "exp" in payload and int(payload["exp"]) < int(datetime.now(timezone.utc).timestamp()):
+        if "exp" in payload and int(payload["exp"]) < int(time.time()):
             raise TokenExpired("Token expired")
         return payload
     except ValueError:
         raise TokenInvalid("Malformed token")
+
+def verify_token(token: str, typ: str = "access") -> Dict[str, Any]:
+    # `typ` keeps refresh tokens out of API calls and access tokens out of /auth/refresh
+    if TOKEN_CACHE_SIZE <= 0:
+        payload = _verify(token)
+    else:
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = int(time.time())
+        payload = _token_cache.get(key, now)
+        if payload is None:
+            payload = _verify(token)
+            _token_cache.put(key, int(payload["exp"]) if "exp" in payload else None, payload)
+    if payload.get("typ", "access") != typ:
+        raise TokenInvalid("Wrong token type")
+    if "nbf" in payload and payload["nbf"] > time.time():
+        raise TokenNotYetValid("Token not valid yet", payload["nbf"])
+    return dict(payload)  # callers get their own copy of the cached claims
+
+# Signed codes: "<value>.<truncated HMAC>". Anyone holding CODE_SECRET can check a
+# code in memory, without looking it up in a database.
+def _code_sig(value: str, secret: Optional[str]) -> str:
+    return _sign(CODE_DOMAIN + value.encode(), secret or CODE_SECRET)[:CODE_SIG_LEN]
+
+def sign_code(value: str, secret: Optional[str] = None) -> str:
+    if not CODE_VALUE_RE.fullmatch(value):
+        raise ValueError("Signed code values are 12 lowercase hex chars")
+    return f"{value}.{_code_sig(value, secret)}"
+
+def verify_signed_code(code: str, secret: Optional[str] = None) -> Optional[str]:
+    value, sep, sig = code.rpartition(".")
+    if not sep or not CODE_VALUE_RE.fullmatch(value):
+        return None
+    return value if hmac.compare_digest(sig, _code_sig(value, secret)) else None
@@ -0,0 +1,38 @@
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Startup settings passed to each service's create_app(). Settings.from_env() reads
+# the environment variables the services always used; tests and scripts build
+# their own, e.g. create_app(Settings(database_url="sqlite:////tmp/t/event.db", migrate=True))
+# (a file: the event service reads through a second, async engine).
+# Tuning knobs (pool sizes, cache, timeouts...) stay module-level env settings.
+
+def _origins(raw: str) -> List[str]:
+    return ["*"] if raw == "*" else [o.strip() for o in raw.split(",") if o.strip()]
+
+def _urls(raw: Optional[str]) -> Optional[List[str]]:
+    return None if raw is None else [u.strip() for u in raw.split(",") if u.strip()]
+
+@dataclass
+class Settings:
+    database_url: Optional[str] = None  # None: the service's DATABASE_URL default
+    replica_urls: Optional[List[str]] = None  # event service read replicas; None: DATABASE_REPLICA_URLS
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    metrics: bool = True
+    migrate: bool = False  # create/upgrade the schema in lifespan startup (tests); deployments migrate first
+    mongo_url: Optional[str] = None  # client service
+    mongo_db: Optional[str] = None
+    event_service_url: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            replica_urls=_urls(os.getenv("DATABASE_REPLICA_URLS")),
+            cors_origins=_origins(os.getenv("CORS_ORIGINS", "*")),
+            metrics=os.getenv("METRICS_ENABLED", "1") == "1",
+            mongo_url=os.getenv("MONGO_URL"),
+            mongo_db=os.getenv("MONGO_DB"),
+            event_service_url=os.getenv("EVENT_SERVICE_URL"),
+        )
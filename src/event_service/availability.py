@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import select
+from event_service import models
+
+# Live seat availability for on-sales.
+# Purchases and refunds call notify() after their commit. One broadcaster task per
+# app wakes every TICK_MS, reads `remaining` for the ids touched since the last
+# tick (one query per table, however many watchers there are), and hands each
+# changed value, serialized once, to the subscribers watching it. Slow subscribers
+# only ever hold the latest value per id, so bursts coalesce instead of queueing.
+#
+# Writes made by other worker processes do not call our notify(), so watched ids
+# are also re-read every POLL_MS (0 turns that off for single-process setups).
+
+TICK_MS = float(os.getenv("AVAILABILITY_TICK_MS", "10"))
+POLL_MS = float(os.getenv("AVAILABILITY_POLL_MS", "1000"))
+HEARTBEAT_SECONDS = float(os.getenv("AVAILABILITY_HEARTBEAT_SECONDS", "15"))
+MAX_IDS = 100  # per stream
+
+Key = Tuple[str, int]  # ("event" | "package", id)
+_MODELS = {"event": models.Event, "package": models.Package}
+_MISSING = object()
+
+def _message(key: Key, remaining: Optional[int]) -> bytes:
+    data = json.dumps({"type": key[0], "id": key[1], "available_tickets": remaining}, separators=(",", ":"))
+    return f"event: availability\ndata: {data}\n\n".encode()
+
+class UnknownIds(Exception):
+    def __init__(self, keys: Iterable[Key]):
+        self.keys = sorted(keys)
+        super().__init__(", ".join(f"{kind} {obj_id}" for kind, obj_id in self.keys))
+
+class Subscriber:
+    def __init__(self, keys: Set[Key]):
+        self.keys = keys
+        self.pending: Dict[Key, bytes] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, key: Key, message: bytes) -> None:
+        self.pending[key] = message  # newer value replaces one not sent yet
+        self.ready.set()
+
+    async def next(self, timeout: float) -> bytes:
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return b": ping\n\n"
+        self.ready.clear()
+        batch, self.pending = self.pending, {}
+        return b"".join(batch.values())
+
+class Broadcaster:
+    def __init__(self, database):
+        self.database = database  # event_service.db.Database
+        self.watchers: Dict[Key, Set[Subscriber]] = {}
+        self.last: Dict[Key, Optional[int]] = {}
+        self._dirty: Set[Key] = set()
+        self._lock = threading.Lock()  # notify() runs on threadpool threads
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_lock: Optional[asyncio.Lock] = None
+
+    def notify(self, kind: str, obj_id: Optional[int]) -> None:
+        key = (kind, obj_id)
+        if obj_id and key in self.watchers:
+            with self._lock:
+                self._dirty.add(key)
+
+    async def subscribe(self, keys: Set[Key]) -> Subscriber:
+        # raises UnknownIds for ids with no event/package row
+        sub = Subscriber(keys)
+        # watched before the snapshot is read, so a change committed meanwhile is not missed
+        for key in keys:
+            self.watchers.setdefault(key, set()).add(sub)
+        if self._snapshot_lock is None:
+            self._snapshot_lock = asyncio.Lock()
+        try:
+            # a crowd connecting at once waits for one snapshot query instead of each running its own
+            async with self._snapshot_lock:
+                unknown = [k for k in keys if k not in self.last]
+                if unknown:
+                    self.last.update(await self._fetch(unknown))
+            missing = [k for k in keys if k not in self.last]
+            if missing:
+                raise UnknownIds(missing)
+        except BaseException:
+            self.unsubscribe(sub)
+            raise
+        for key in keys:  # initial snapshot
+            sub.push(key, _message(key, self.last[key]))
+        if self._task is None or self._task.done():
+            # fresh context: the ticker's queries are not part of this request's metrics
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        for key in sub.keys:
+            subs = self.watchers.get(key)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self.watchers[key]
+                    self.last.pop(key, None)
+
+    async def _fetch(self, keys: Iterable[Key]) -> Dict[Key, Optional[int]]:
+        by_kind: Dict[str, list] = {}
+        for kind, obj_id in keys:
+            by_kind.setdefault(kind, []).append(obj_id)
+        values = {}
+        async with self.database.AsyncSessionLocal() as db:
+            for kind, ids in by_kind.items():
+                model = _MODELS[kind]
+                rows = await db.execute(select(model.id, model.remaining).where(model.id.in_(ids)))
+                values.update({(kind, obj_id): remaining for obj_id, remaining in rows})
+        return values
+
+    async def _run(self) -> None:
+        next_poll = time.monotonic() + POLL_MS / 1000
+        while self.watchers:
+            await asyncio.sleep(TICK_MS / 1000)
+            with self._lock:
+                keys, self._dirty = self._dirty, set()
+            if POLL_MS > 0 and time.monotonic() >= next_poll:
+                keys |= set(self.watchers)
+                next_poll = time.monotonic() + POLL_MS / 1000
+            keys &= set(self.watchers)
+            if not keys:
+                continue
+            try:
+                values = await self._fetch(keys)
+            except Exception:
+                continue  # keep streaming; the next tick or poll retries
+            for key, remaining in values.items():
+                if self.last.get(key, _MISSING) == remaining or key not in self.watchers:
+                    continue
+                self.last[key] = remaining
+                message = _message(key, remaining)
+                for sub in self.watchers[key]:
+                    sub.push(key, message)
+
+    async def stream(self, sub: Subscriber):
+        try:
+            while True:
+                yield await sub.next(HEARTBEAT_SECONDS)
+        finally:
+            self.unsubscribe(sub)
+
+def parse_ids(kind: str, raw: Optional[str]) -> Set[Key]:
+    if not raw:
+        return set()
+    return {(kind, int(part)) for part in raw.split(",") if part.strip()}
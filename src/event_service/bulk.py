@@ -0,0 +1,88 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Tuple
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from event_service import models, schemas
+
+# Streaming bulk import of events/packages.
+# The body is NDJSON (one object per line) or CSV with a header row, read
+# incrementally; rows are validated with the regular input schemas and written
+# in chunks with one executemany INSERT per chunk.
+
+CHUNK_SIZE = 1000
+
+async def _lines(request: Request) -> AsyncIterator[str]:
+    buf = b""
+    async for piece in request.stream():
+        buf += piece
+        *complete, buf = buf.split(b"\n")
+        for line in complete:
+            yield line.decode("utf-8")
+    if buf:
+        yield buf.decode("utf-8")
+
+def _csv_row(header: List[str], line: str) -> Dict:
+    values = next(csv.reader([line]))
+    row = {k: (v if v != "" else None) for k, v in zip(header, values)}
+    if "event_ids" in row:  # an empty cell is a package without events
+        row["event_ids"] = [int(x) for x in (row["event_ids"] or "").split(";") if x.strip()]
+    return row
+
+async def records(request: Request, schema: type) -> AsyncIterator[Tuple[int, BaseModel]]:
+    content_type = request.headers.get("content-type", "")
+    is_csv = "csv" in content_type
+    header = None
+    lineno = 0
+    async for line in _lines(request):
+        lineno += 1
+        line = line.rstrip("\r")
+        if not line.strip():
+            continue
+        try:
+            if is_csv:
+                if header is None:
+                    header = next(csv.reader([line]))
+                    continue
+                data = _csv_row(header, line)
+            else:
+                data = json.loads(line)
+            yield lineno, schema.model_validate(data)
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"line {lineno}: {e}")
+
+async def chunks(request: Request, schema: type) -> AsyncIterator[List[Tuple[int, BaseModel]]]:
+    chunk = []
+    async for item in records(request, schema):
+        chunk.append(item)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def insert_events(db: Session, owner_id: int, chunk: List[Tuple[int, schemas.EventIn]]) -> int:
+    rows = [{"id_owner": owner_id, **ev.model_dump(), "remaining": ev.seats} for _, ev in chunk]
+    db.execute(insert(models.Event), rows)
+    db.commit()
+    return len(rows)
+
+def insert_packages(db: Session, owner_id: int, chunk: List[Tuple[int, schemas.PackageIn]]) -> int:
+    # one lookup for every event referenced by the chunk, same rules as create_package
+    event_ids = {eid for _, pkg in chunk for eid in pkg.event_ids}
+    seats = dict(db.execute(select(models.Event.id, models.Event.seats).where(models.Event.id.in_(event_ids))).all()) if event_ids else {}
+    for lineno, pkg in chunk:
+        if any(eid not in seats for eid in pkg.event_ids):
+            raise HTTPException(status_code=400, detail=f"line {lineno}: Some events not found")
+        limits = [seats[eid] for eid in pkg.event_ids if seats[eid] is not None]
+        if pkg.seats is not None and limits and pkg.seats > min(limits):
+            raise HTTPException(status_code=400, detail=f"line {lineno}: Package seats must be <= min seats of events")
+    rows = [{"id_owner": owner_id, **pkg.model_dump(exclude={"event_ids"}), "remaining": pkg.seats} for _, pkg in chunk]
+    ids = db.scalars(insert(models.Package).returning(models.Package.id, sort_by_parameter_order=True), rows).all()
+    links = [{"package_id": pid, "event_id": eid} for pid, (_, pkg) in zip(ids, chunk) for eid in set(pkg.event_ids)]
+    if links:
+        db.execute(insert(models.PackageEvent), links)
+    db.commit()
+    return len(rows)
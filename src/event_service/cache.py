@@ -0,0 +1,140 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Request, Response
+from common.pagination import NEXT_CURSOR_HEADER
+
+# Response cache for catalog reads.
+# Serialized response bytes are stored under the route path plus the normalized
+# query string. Every key also carries a catalog "generation" number; writes to
+# events/packages bump the generation, which invalidates every cached page at once
+# (old entries just age out). Clients that send If-None-Match get a 304.
+#
+# Backends: MemoryCache (per process, LRU + TTL) and RedisCache (shared by all
+# workers, needs the optional `redis` package). CACHE_URL selects one:
+# "memory://" (default), "redis://host:6379/0", or "off".
+
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "2"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+GENERATION_KEY = "catalog:gen"
+
+class MemoryCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: dict = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+class RedisCache:
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("CACHE_URL points to redis but the `redis` package is not installed")
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self._redis.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+def make_backend(url: str = CACHE_URL):
+    if url == "off":
+        return None
+    if url.startswith("redis"):
+        return RedisCache(url)
+    return MemoryCache()
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def json_response(request: Request, body: bytes, etag: str, next_cursor: Optional[str]) -> Response:
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def _key(self, request: Request) -> str:
+        gen = await self.backend.get_counter(GENERATION_KEY)
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()) if v != "")
+        return f"catalog:{gen}:{request.url.path}?{params}"
+
+    async def get(self, request: Request) -> Optional[Response]:
+        if self.backend is None:
+            return None
+        entry = await self.backend.get(await self._key(request))
+        if entry is None:
+            return None
+        etag, cursor, body = entry.split(b"\n", 2)
+        return json_response(request, body, etag.decode(), cursor.decode() or None)
+
+    async def put(self, request: Request, body: bytes, next_cursor: Optional[str] = None) -> Response:
+        etag = _etag(body)
+        if self.backend is not None:
+            entry = etag.encode() + b"\n" + (next_cursor or "").encode() + b"\n" + body
+            await self.backend.set(await self._key(request), entry, self.ttl)
+        return json_response(request, body, etag, next_cursor)
+
+    async def invalidate(self) -> None:
+        if self.backend is not None:
+            await self.backend.incr(GENERATION_KEY)
+
+
+class PrimaryPins:
+    # Read-your-writes with read replicas: after a write, the writer's catalog reads go to
+    # the primary for REPLICA_STICKY_SECONDS (keep it above the replication lag). Stored in
+    # redis when the catalog cache uses it, so every worker honours it; otherwise per process,
+    # in a store of their own so catalog pages cannot evict them.
+    def __init__(self, backend, ttl: float = REPLICA_STICKY_SECONDS):
+        self.backend = backend or MemoryCache(max_entries=100_000)
+        self.ttl = ttl
+
+    async def pin(self, who: str) -> None:
+        await self.backend.set(f"primary:{who}", b"1", self.ttl)
+
+    async def pinned(self, who: str) -> bool:
+        return await self.backend.get(f"primary:{who}") is not None
+
+def make_pins(catalog_cache: ResponseCache) -> PrimaryPins:
+    return PrimaryPins(catalog_cache.backend if isinstance(catalog_cache.backend, RedisCache) else None)
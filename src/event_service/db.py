@@ -1,8 +1,128 @@
+import itertools
 import os
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from common.metrics import instrument_engine
+
+def normalize_url(url: str) -> str:
+    # "postgres://" is what most hosting providers hand out, SQLAlchemy only knows "postgresql://"
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+SQLALCHEMY_DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./event.db"))
+# Read replicas (comma-separated URLs) for catalog reads, see read_session()
+REPLICA_URLS = [normalize_url(u.strip()) for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+
+# Pool sizing (per process). The sync engine serves writes from the threadpool,
+# the async engine serves read endpoints from the event loop. With several
+# workers (WEB_CONCURRENCY) one process can hold up to 2 * (DB_POOL_SIZE +
+# DB_MAX_OVERFLOW) connections, so size these against the server's max_connections.
+# Keep DB_POOL_SIZE + DB_MAX_OVERFLOW >= 40 (Starlette's threadpool): a sync endpoint
+# that still holds a connection when it returns needs a thread again for response
+# validation, and a smaller pool can leave every thread waiting on the pool.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+def async_url(url: str) -> str:
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+def engine_kwargs(url: str) -> dict:
+    if not url.startswith("sqlite"):
+        return {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT,
+                "pool_recycle": POOL_RECYCLE, "pool_pre_ping": True}
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in url and not url.rstrip("/").endswith(":"):
+        kwargs.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    return kwargs
+
+def _sqlite_on_connect(dbapi_conn, _record):
+    # WAL lets readers run while a ticket insert holds the write lock,
+    # busy_timeout makes concurrent writers wait instead of failing with "database is locked"
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+def configure_engine(sync_engine, label: str = "event") -> None:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _sqlite_on_connect)
+    instrument_engine(sync_engine, label)
+
+def make_engines(url: str):
+    engine = create_engine(url, **engine_kwargs(url))
+    configure_engine(engine)
+    async_engine = create_async_engine(async_url(url), **engine_kwargs(url))
+    configure_engine(async_engine.sync_engine)
+    return engine, async_engine
+
+def make_replica_engines(urls: List[str]):
+    # reads only, so async engines only; labelled apart in the DB metrics
+    engines = []
+    for url in urls:
+        replica = create_async_engine(async_url(url), **engine_kwargs(url))
+        configure_engine(replica.sync_engine, "event-replica")
+        engines.append(replica)
+    return engines
+
+class Database:
+    # The engines and session factories of one app: create_app() builds its own, so
+    # several apps in one process (tests) each talk to their own database.
+    # Creating the engines does not connect; the first session does.
+    def __init__(self, url: str = SQLALCHEMY_DATABASE_URL, replica_urls: Optional[List[str]] = None):
+        self.url = normalize_url(url)
+        self.engine, self.async_engine = make_engines(self.url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        urls = REPLICA_URLS if replica_urls is None else [normalize_url(u) for u in replica_urls]
+        self.replica_engines = make_replica_engines(urls)
+        self._next_replica = itertools.cycle(self.replica_engines)
+
+    @property
+    def fts(self) -> bool:
+        # FTS5 search tables (event_service.search) only exist on SQLite
+        return self.engine.dialect.name == "sqlite"
+
+    # Catalog reads can go to a replica; they may lag the primary by the replication delay.
+    # Writes and anything read inside a write transaction stay on SessionLocal (primary).
+    def read_session(self, primary: bool = False) -> AsyncSession:
+        # the next replica (round robin), or the primary when asked or when there are none
+        if primary or not self.replica_engines:
+            return self.AsyncSessionLocal()
+        return self.AsyncSessionLocal(bind=next(self._next_replica), info={"primary": self.AsyncSessionLocal})
+
+    async def dispose(self) -> None:
+        for replica in self.replica_engines:
+            await replica.dispose()
+        await self.async_engine.dispose()
+        self.engine.dispose()
+
+def on_replica(session: AsyncSession) -> bool:
+    return "primary" in session.info
+
+@asynccontextmanager
+async def primary_of(session: AsyncSession):
+    # for re-checking a replica miss: the session itself when it is already on the primary
+    if not on_replica(session):
+        yield session
+        return
+    async with session.info["primary"]() as primary:
+        yield primary
+
+# The environment's database, for scripts and `python -m event_service.migrate`;
+# apps get their own Database from create_app()
+default = Database()
+engine, SessionLocal = default.engine, default.SessionLocal
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./event.db")
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
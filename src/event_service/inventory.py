@@ -0,0 +1,89 @@
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import update, select, func
+from sqlalchemy.orm import Session
+from event_service import models
+
+# Seat inventory: every event/package keeps a `sold` and `remaining` counter.
+# A reservation is a single conditional UPDATE on the primary key, so the
+# database serializes concurrent buyers and a purchase never scans `tickets`.
+
+class InventoryError(Exception): ...
+class NotFound(InventoryError): ...
+class SoldOut(InventoryError): ...
+
+def _take(db: Session, model, obj_id: int, qty: int) -> None:
+    stmt = (
+        update(model)
+        .where(model.id == obj_id)
+        .where(model.remaining.is_(None) | (model.remaining >= qty))
+        .values(sold=model.sold + qty, remaining=model.remaining - qty)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount == 1:
+        return
+    # nothing updated: either the row is missing or there are not enough seats left
+    if db.get(model, obj_id) is None:
+        raise NotFound(f"{model.__name__} not found")
+    raise SoldOut("Sold out")
+
+def _give_back(db: Session, model, obj_id: int, qty: int) -> None:
+    stmt = (
+        update(model)
+        .where(model.id == obj_id)
+        .values(sold=model.sold - qty, remaining=model.remaining + qty)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(stmt)
+
+# Takes `qty` seats inside the caller's transaction; the caller rolls back on error.
+def reserve(db: Session, event_id: Optional[int], package_id: Optional[int], qty: int = 1) -> None:
+    if event_id:
+        _take(db, models.Event, event_id, qty)
+    if package_id:
+        _take(db, models.Package, package_id, qty)
+
+# Batch version of reserve(): quantities are summed per event/package and taken in
+# id order, so concurrent batches lock rows in the same order.
+def reserve_many(db: Session, items: Iterable[Tuple[Optional[int], Optional[int], int]]) -> None:
+    events: Counter = Counter()
+    packages: Counter = Counter()
+    for event_id, package_id, qty in items:
+        if event_id:
+            events[event_id] += qty
+        if package_id:
+            packages[package_id] += qty
+    for event_id in sorted(events):
+        _take(db, models.Event, event_id, events[event_id])
+    for package_id in sorted(packages):
+        _take(db, models.Package, package_id, packages[package_id])
+
+def release(db: Session, event_id: Optional[int], package_id: Optional[int], qty: int = 1) -> None:
+    if event_id:
+        _give_back(db, models.Event, event_id, qty)
+    if package_id:
+        _give_back(db, models.Package, package_id, qty)
+
+# Applies an edit that may change `seats`. Seats may only change while nothing is sold,
+# and `remaining` is recomputed from the row's current `sold` in the same UPDATE, so a
+# purchase committed in between can neither be overwritten nor slip past the rule.
+# Returns False when the row is gone or already has sales under a different seat count.
+def update_seats(db: Session, model, obj_id: int, values: dict) -> bool:
+    seats = values.get("seats")
+    unchanged = model.seats.is_(None) if seats is None else model.seats == seats
+    stmt = (
+        update(model)
+        .where(model.id == obj_id)
+        .where((model.sold == 0) | unchanged)
+        .values(**values, remaining=None if seats is None else seats - model.sold)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount == 1
+
+# Recomputes sold/remaining from the tickets table (seeded or legacy data).
+def rebuild_counters(db: Session) -> None:
+    for model, fk in ((models.Event, models.Ticket.event_id), (models.Package, models.Ticket.package_id)):
+        sold = select(func.count(models.Ticket.code)).where(fk == model.id).scalar_subquery()
+        db.execute(update(model).values(sold=sold).execution_options(synchronize_session=False))
+        db.execute(update(model).values(remaining=model.seats - model.sold).execution_options(synchronize_session=False))
+    db.commit()
@@ -1,64 +1,199 @@
-import os
+import time
 import uuid
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+import anyio
+from pydantic import TypeAdapter
+from fastapi import APIRouter, FastAPI, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from event_service.db import Base, engine, SessionLocal
-from event_service import models, schemas
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from event_service import db as event_db
+from event_service.migrate import migrate
+from event_service import models, schemas, inventory, search, validation, bulk, availability, waiting_room
+from event_service.cache import ResponseCache, make_backend, make_pins
+from common import metrics, responses
 from common.deps import get_current_user, require_role
+from common.security import sign_code
+from common.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate, next_cursor
+from common.settings import Settings
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Event Service")
+router = APIRouter()
 
-origins = os.getenv("CORS_ORIGINS", "*")
-allow_origins = ["*"] if origins == "*" else [o.strip() for o in origins.split(",") if o.strip()]
-app.add_middleware(CORSMiddleware, allow_origins=allow_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+class Services:
+    # Everything an app keeps between requests: its database, the catalog cache, replica
+    # pins, the revocation filter, the availability broadcaster and the waiting room joiner.
+    # One per app, on app.state.services, so apps built in one process share nothing.
+    def __init__(self, settings: Settings):
+        self.db = event_db.Database(settings.database_url or event_db.SQLALCHEMY_DATABASE_URL, settings.replica_urls)
+        self.catalog_cache = ResponseCache(make_backend())
+        self.pins = make_pins(self.catalog_cache)
+        self.revoked = validation.RevocationSet()
+        self.broadcaster = availability.Broadcaster(self.db)
+        self.joiner = waiting_room.Joiner(self.db)
 
-def get_db():
-    db = SessionLocal()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services = app.state.services
+    if app.state.settings.migrate:
+        await run_in_threadpool(migrate, services.db.engine)
+    yield
+    await services.db.dispose()
+
+# The schema is not created here: run `python -m event_service.migrate` (run_event.py does) or pass migrate=True
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    app = FastAPI(title="Event Service", lifespan=lifespan)
+    app.state.settings = settings
+    app.state.services = Services(settings)
+    app.add_middleware(CORSMiddleware, allow_origins=settings.cors_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Retry-After"])
+    metrics.install(app, "event", settings.metrics)
+    app.include_router(router)
+    return app
+
+def __getattr__(name):
+    # `event_service.main:app` (older entry points and scripts): built on first access
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_services(request: Request) -> Services:
+    return request.app.state.services
+
+def get_db(svc: Services = Depends(get_services)):
+    db = svc.db.SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# read-only endpoints run on the event loop with pooled async sessions
+async def get_async_db(svc: Services = Depends(get_services)):
+    async with svc.db.AsyncSessionLocal() as db:
+        yield db
+
+# catalog reads: a read replica when configured, the primary for a caller who just wrote
+async def get_read_db(svc: Services = Depends(get_services), user=Depends(get_current_user)):
+    primary = bool(svc.db.replica_engines) and await svc.pins.pinned(user["sub"])
+    async with svc.db.read_session(primary) as db:
+        yield db
+
 # Utilities
 def ensure_owner(user: dict) -> int:
-    # ???????
-    return abs(hash(user["sub"])) % (10**6)
+    # owner id = the auth service user id from the token, the same in every worker and after restarts
+    uid = user.get("uid")
+    if uid is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has no user id, log in again")
+    return int(uid)
+
+SORT_PATTERN = "^-?available_tickets$"
+
+# Catalog reads are served from catalog_cache as pre-serialized JSON; catalog writes invalidate it.
+# Availability in cached pages may lag purchases by up to CACHE_TTL_SECONDS.
+EVENT_LIST = TypeAdapter(List[schemas.EventOut])
+PACKAGE_LIST = TypeAdapter(List[schemas.PackageOut])
+PACKAGE_DETAIL_LIST = TypeAdapter(List[schemas.PackageDetailOut])
+EMBED_PATTERN = "^events$"
+
+# FAST_JSON (common.responses): list pages select just these columns, in response field order
+EVENT_COLUMNS = (models.Event.name, models.Event.location, models.Event.description, models.Event.seats,
+                 models.Event.id, models.Event.id_owner, models.Event.remaining.label("available_tickets"))
+PACKAGE_COLUMNS = (models.Package.id, models.Package.id_owner, models.Package.name, models.Package.location,
+                   models.Package.description, models.Package.seats, models.Package.remaining.label("available_tickets"))
+
+def embed_events(query, embed: Optional[str]):
+    # ?embed=events: one extra IN query for the whole page instead of one per package
+    if embed:
+        return query.options(selectinload(models.Package.events)), PACKAGE_DETAIL_LIST, None
+    return query, PACKAGE_LIST, PACKAGE_COLUMNS
+
+async def fetch_rows(db: AsyncSession, query, adapter: TypeAdapter, columns=None):
+    # -> (JSON body, rows); rows are column tuples on the FAST_JSON path, ORM objects otherwise
+    if responses.FAST_JSON and columns:
+        rows = (await db.execute(query.with_only_columns(*columns))).all()
+        return responses.rows_json(rows), rows
+    rows = (await db.execute(query)).scalars().all()
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True)), rows
+
+def page_response(body: bytes, cursor: Optional[str]) -> Response:
+    return Response(content=body, media_type="application/json", headers={NEXT_CURSOR_HEADER: cursor} if cursor else None)
+
+def invalidate_catalog(svc: Services):
+    # sync endpoints run in the threadpool, the cache lives on the event loop
+    anyio.from_thread.run(svc.catalog_cache.invalidate)
+
+def pin_to_primary(svc: Services, user: dict):
+    # after commit: the writer's next reads must see the write, replicas may not have it yet
+    if svc.db.replica_engines:
+        anyio.from_thread.run(svc.pins.pin, user["sub"])
+
+async def cached_page(svc: Services, request: Request, db: AsyncSession) -> Optional[Response]:
+    # a reader pinned to the primary skips the cache, which may hold a page read from a lagging replica
+    if svc.db.replica_engines and not event_db.on_replica(db):
+        return None
+    return await svc.catalog_cache.get(request)
+
+def admit(db: Session, user: dict, event_ids, package_ids, token: Optional[str]):
+    try:
+        waiting_room.check(db, user["sub"], event_ids, package_ids, token)
+    except waiting_room.TooEarly as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_425_TOO_EARLY, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except waiting_room.AdmissionUsed as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except waiting_room.NotAdmitted as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+def publish_availability(svc: Services, event_id: Optional[int], package_id: Optional[int]):
+    # after commit; the broadcaster re-reads the counters on its next tick
+    svc.broadcaster.notify("event", event_id)
+    svc.broadcaster.notify("package", package_id)
+
+def filter_available(query, model, available_tickets: Optional[int], sort: Optional[str]):
+    # availability is the materialized `remaining` column (indexed), no join/aggregate;
+    # unlimited events/packages (remaining NULL) have no number to filter or sort on
+    if available_tickets is not None:
+        query = query.where(model.remaining >= available_tickets)
+    if sort:
+        query = query.where(model.remaining.is_not(None))
+        return query, model.remaining, sort.startswith("-")
+    return query, None, False
 
 # Events
-@app.get("/events", response_model=List[schemas.EventOut])
-def list_events(q: Optional[str] = None, loc: Optional[str] = None,
-                minSeats: Optional[int] = None, maxSeats: Optional[int] = None,
-                db: Session = Depends(get_db), user=Depends(get_current_user)):
-    query = db.query(models.Event)
-    if q:
-        like = f"%{q.lower()}%"
-        query = query.filter(func.lower(models.Event.name).like(like))
-    if loc:
-        like = f"%{loc.lower()}%"
-        query = query.filter(func.lower(models.Event.location).like(like))
+@router.get("/events", response_model=List[schemas.EventOut])
+async def list_events(request: Request, q: Optional[str] = None, loc: Optional[str] = None,
+                      minSeats: Optional[int] = None, maxSeats: Optional[int] = None,
+                      available_tickets: Optional[int] = Query(None, ge=0),
+                      page: int = Query(1, ge=1),
+                      items_per_page: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+                      cursor: Optional[str] = None,
+                      sort: Optional[str] = Query(None, pattern=SORT_PATTERN),
+                      db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    cached = await cached_page(svc, request, db)
+    if cached:
+        return cached
+    query, key = search.events(q=q, loc=loc, fts=svc.db.fts)
     if minSeats is not None:
-        query = query.filter((models.Event.seats >= minSeats) | (models.Event.seats.is_(None)))
+        query = query.where((models.Event.seats >= minSeats) | (models.Event.seats.is_(None)))
     if maxSeats is not None:
-        query = query.filter((models.Event.seats <= maxSeats) | (models.Event.seats.is_(None)))
-    # Filtrare după numărul de bilete disponibile
-    available_tickets: Optional[int] = Query(None, ge=0)
-    page: int = Query(1, ge=1)
-    items_per_page: int = Query(10, ge=1)
-    if available_tickets is not None:
-        query = query.outerjoin(models.Ticket, models.Event.id == models.Ticket.event_id)
-        query = query.group_by(models.Event.id)
-        query = query.having((models.Event.seats - func.count(models.Ticket.code)) >= available_tickets)
-    # paginare
-    return query.offset((page - 1) * items_per_page).limit(items_per_page).all()
-
-@app.post("/events", response_model=schemas.EventOut)
-def create_event(body: schemas.EventIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event"))):
+        query = query.where((models.Event.seats <= maxSeats) | (models.Event.seats.is_(None)))
+    # Filtrare și sortare după numărul de bilete disponibile
+    query, sort_col, descending = filter_available(query, models.Event, available_tickets, sort)
+    # paginare: cursor (keyset) sau page (compatibilitate)
+    body, rows = await fetch_rows(db, paginate(query, key, cursor, page, items_per_page, sort_col, descending), EVENT_LIST, EVENT_COLUMNS)
+    return await svc.catalog_cache.put(request, body, next_cursor(rows, items_per_page, "available_tickets" if sort else None))
+
+@router.post("/events", response_model=schemas.EventOut)
+def create_event(body: schemas.EventIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event")), svc: Services = Depends(get_services)):
     owner_id = ensure_owner(user)
-    ev = models.Event(id_owner=owner_id, name=body.name, location=body.location, description=body.description, seats=body.seats)
+    ev = models.Event(id_owner=owner_id, name=body.name, location=body.location, description=body.description, seats=body.seats, remaining=body.seats)
     db.add(ev)
     try:
         db.commit()
@@ -66,134 +201,327 @@ def create_event(body: schemas.EventIn, db: Session = Depends(get_db), user=Depe
         db.rollback()
         raise HTTPException(status_code=400, detail="Event name must be unique")
     db.refresh(ev)
+    invalidate_catalog(svc)
+    pin_to_primary(svc, user)
     return ev
 
-@app.put("/events/{event_id}", response_model=schemas.EventOut)
-def update_event(event_id: int, body: schemas.EventIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event"))):
+@router.put("/events/{event_id}", response_model=schemas.EventOut)
+def update_event(event_id: int, body: schemas.EventIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event")), svc: Services = Depends(get_services)):
     owner_id = ensure_owner(user)
-    ev = db.query(models.Event).get(event_id)
+    ev = db.get(models.Event, event_id)
     if not ev:
         raise HTTPException(status_code=404, detail="Event not found")
     if ev.id_owner != owner_id:
         raise HTTPException(status_code=403, detail="Forbidden")
-    # Rule: seats cannot be changed after first ticket sold
-    ticket_exists = db.query(models.Ticket).filter(models.Ticket.event_id == event_id).first()
-    if ticket_exists and body.seats != ev.seats:
+    # Rule: seats cannot be changed after first ticket sold. Checked against the row
+    # itself by the UPDATE (not `ev.sold`, which a concurrent purchase may have outdated)
+    if not inventory.update_seats(db, models.Event, event_id, body.dict()):
+        db.rollback()
+        if db.get(models.Event, event_id) is None:
+            raise HTTPException(status_code=404, detail="Event not found")
         raise HTTPException(status_code=400, detail="Cannot modify seats after tickets sold")
-    for k, v in body.dict().items():
-        setattr(ev, k, v)
     db.commit()
     db.refresh(ev)
+    invalidate_catalog(svc)
+    pin_to_primary(svc, user)
+    svc.broadcaster.notify("event", ev.id)
     return ev
 
+# Bulk import: NDJSON or CSV body, inserted in chunks (each chunk is one transaction)
+async def _import(svc: Services, request: Request, db: Session, user: dict, schema, insert_chunk, what: str):
+    owner_id = ensure_owner(user)
+    imported = 0
+    try:
+        async for chunk in bulk.chunks(request, schema):
+            try:
+                imported += await run_in_threadpool(insert_chunk, db, owner_id, chunk)
+            except IntegrityError:
+                db.rollback()
+                raise HTTPException(status_code=400, detail=f"lines {chunk[0][0]}-{chunk[-1][0]}: {what} name must be unique ({imported} imported before)")
+            except Exception:
+                db.rollback()
+                raise
+    finally:
+        if imported:
+            await svc.catalog_cache.invalidate()
+            if svc.db.replica_engines:
+                await svc.pins.pin(user["sub"])
+    return {"imported": imported}
+
+@router.post("/events/import", response_model=schemas.ImportOut)
+async def import_events(request: Request, db: Session = Depends(get_db), user=Depends(require_role("owner-event")), svc: Services = Depends(get_services)):
+    return await _import(svc, request, db, user, schemas.EventIn, bulk.insert_events, "Event")
+
+@router.post("/packages/import", response_model=schemas.ImportOut)
+async def import_packages(request: Request, db: Session = Depends(get_db), user=Depends(require_role("owner-event")), svc: Services = Depends(get_services)):
+    return await _import(svc, request, db, user, schemas.PackageIn, bulk.insert_packages, "Package")
+
 # Packages
-@app.post("/packages", response_model=schemas.PackageOut)
-def create_package(body: schemas.PackageIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event"))):
+@router.post("/packages", response_model=schemas.PackageOut)
+def create_package(body: schemas.PackageIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event")), svc: Services = Depends(get_services)):
     owner_id = ensure_owner(user)
-    # compute min seats
-    if body.event_ids:
-        events = db.query(models.Event).filter(models.Event.id.in_(body.event_ids)).all()
-        if not events or len(events) != len(body.event_ids):
+    event_ids = set(body.event_ids)
+    # existence + min seats in one aggregate (MIN ignores events without a seat limit)
+    if event_ids:
+        found, min_seats = db.execute(
+            select(func.count(models.Event.id), func.min(models.Event.seats)).where(models.Event.id.in_(event_ids))
+        ).one()
+        if found != len(event_ids):
             raise HTTPException(status_code=400, detail="Some events not found")
-        min_seats = min([e.seats or 0 for e in events]) if any(e.seats is not None for e in events) else None
         if body.seats is not None and min_seats is not None and body.seats > min_seats:
             raise HTTPException(status_code=400, detail="Package seats must be <= min seats of events")
-    pkg = models.Package(id_owner=owner_id, name=body.name, location=body.location, description=body.description, seats=body.seats)
+    pkg = models.Package(id_owner=owner_id, name=body.name, location=body.location, description=body.description, seats=body.seats, remaining=body.seats)
     db.add(pkg)
+    # package + join rows in a single transaction
     try:
+        db.flush()
+        if event_ids:
+            db.execute(insert(models.PackageEvent), [{"package_id": pkg.id, "event_id": eid} for eid in event_ids])
+        out = schemas.PackageOut.model_validate(pkg)
         db.commit()
-    except Exception:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Package name must be unique")
-    db.refresh(pkg)
-    # join
-    for eid in body.event_ids:
-        db.add(models.PackageEvent(package_id=pkg.id, event_id=eid))
-    db.commit()
-    return pkg
+    invalidate_catalog(svc)
+    pin_to_primary(svc, user)
+    return out
 
 # Tickets
-@app.post("/tickets", response_model=schemas.TicketOut)
-def create_ticket(body: schemas.TicketIn, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    # simple availability check: count existing tickets for event/package and compare with seats
+@router.post("/tickets", response_model=schemas.TicketOut)
+def create_ticket(body: schemas.TicketIn, db: Session = Depends(get_db), user=Depends(get_current_user),
+                  x_admission_token: Optional[str] = Header(None), svc: Services = Depends(get_services)):
+    # availability check and seat decrement are one conditional UPDATE per event/package
     if not body.event_id and not body.package_id:
         raise HTTPException(status_code=400, detail="Provide event_id or package_id")
-    if body.event_id:
-        ev = db.query(models.Event).get(body.event_id)
-        if not ev:
-            raise HTTPException(status_code=404, detail="Event not found")
-        if ev.seats is not None:
-            sold = db.query(models.Ticket).filter(models.Ticket.event_id == body.event_id).count()
-            if sold >= ev.seats:
-                raise HTTPException(status_code=400, detail="Sold out")
-    if body.package_id:
-        pkg = db.query(models.Package).get(body.package_id)
-        if not pkg:
-            raise HTTPException(status_code=404, detail="Package not found")
-        if pkg.seats is not None:
-            sold = db.query(models.Ticket).filter(models.Ticket.package_id == body.package_id).count()
-            if sold >= pkg.seats:
-                raise HTTPException(status_code=400, detail="Sold out")
-    code = uuid.uuid4().hex[:12]
-    t = models.Ticket(code=code, package_id=body.package_id, event_id=body.event_id)
-    db.add(t)
+    admit(db, user, [body.event_id], [body.package_id], x_admission_token)
+    try:
+        inventory.reserve(db, body.event_id, body.package_id)
+    except inventory.NotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except inventory.SoldOut as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    code = sign_code(uuid.uuid4().hex[:12])
+    db.add(models.Ticket(code=code, package_id=body.package_id, event_id=body.event_id))
+    db.commit()
+    publish_availability(svc, body.event_id, body.package_id)
+    pin_to_primary(svc, user)
+    return {"code": code, "package_id": body.package_id, "event_id": body.event_id}
+
+# Group booking: all seats are reserved in one transaction, or none
+@router.post("/tickets/batch", response_model=List[schemas.TicketOut])
+def create_tickets_batch(body: schemas.TicketBatchIn, db: Session = Depends(get_db), user=Depends(get_current_user),
+                         x_admission_token: Optional[str] = Header(None), svc: Services = Depends(get_services)):
+    if any(not item.event_id and not item.package_id for item in body.items):
+        raise HTTPException(status_code=400, detail="Provide event_id or package_id")
+    admit(db, user, [i.event_id for i in body.items], [i.package_id for i in body.items], x_admission_token)
+    try:
+        inventory.reserve_many(db, [(i.event_id, i.package_id, i.quantity) for i in body.items])
+    except inventory.NotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except inventory.SoldOut as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = [
+        {"code": sign_code(uuid.uuid4().hex[:12]), "package_id": item.package_id, "event_id": item.event_id}
+        for item in body.items for _ in range(item.quantity)
+    ]
+    db.execute(insert(models.Ticket), rows)
+    db.commit()
+    for item in body.items:
+        publish_availability(svc, item.event_id, item.package_id)
+    pin_to_primary(svc, user)
+    return rows
+
+# Waiting rooms: while one is set up for an event, purchases of it (or of packages
+# containing it) need an admission token from POST /events/{id}/queue, one per purchase
+@router.put("/events/{event_id}/waiting-room", response_model=schemas.WaitingRoomOut)
+def set_waiting_room(event_id: int, body: schemas.WaitingRoomIn, db: Session = Depends(get_db), user=Depends(require_role("owner-event"))):
+    ev = db.get(models.Event, event_id)
+    if not ev:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if ev.id_owner != ensure_owner(user):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    room = db.get(models.WaitingRoom, event_id) or models.WaitingRoom(event_id=event_id, next_at=0.0)
+    room.rate = body.rate
+    db.add(room)
     db.commit()
-    db.refresh(t)
-    return {"code": t.code, "package_id": t.package_id, "event_id": t.event_id}
+    return {"event_id": event_id, "rate": room.rate, "wait_seconds": max(0.0, room.next_at - time.time())}
 
-@app.post("/validate/ticket", response_model=schemas.ValidateTicketOut)
-def validate_ticket(body: schemas.ValidateTicketIn, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    exists = db.query(models.Ticket).get(body.code)
-    return {"valid": exists is not None}
+@router.delete("/events/{event_id}/waiting-room")
+def delete_waiting_room(event_id: int, db: Session = Depends(get_db), user=Depends(require_role("owner-event"))):
+    ev = db.get(models.Event, event_id)
+    if not ev:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if ev.id_owner != ensure_owner(user):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    room = db.get(models.WaitingRoom, event_id)
+    if room:
+        db.execute(delete(models.WaitingRoomEntry).where(models.WaitingRoomEntry.event_id == event_id))
+        db.delete(room)
+        db.commit()
+    return {"deleted": room is not None}
+
+@router.post("/events/{event_id}/queue", response_model=schemas.AdmissionOut)
+async def join_queue(event_id: int, user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    joined = await waiting_room.join(svc.joiner, user["sub"], event_id)
+    if joined is None:
+        raise HTTPException(status_code=404, detail="No waiting room for this event")
+    token, admit_at = joined
+    return {"admission_token": token, "admit_at": admit_at, "wait_seconds": max(0.0, admit_at - time.time())}
+
+@router.delete("/tickets/{code}")
+def refund_ticket(code: str, db: Session = Depends(get_db), user=Depends(require_role("admin", "owner-event")), svc: Services = Depends(get_services)):
+    # concurrent refunds of the same code: the second one waits on the row lock, then finds it gone
+    t = db.get(models.Ticket, code, with_for_update=True)
+    if not t:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if user.get("role") != "admin":
+        # owners refund only what they sell
+        owner_model, owner_key = (models.Event, t.event_id) if t.event_id else (models.Package, t.package_id)
+        if db.scalar(select(owner_model.id_owner).where(owner_model.id == owner_key)) != ensure_owner(user):
+            db.rollback()
+            raise HTTPException(status_code=403, detail="Forbidden")
+    inventory.release(db, t.event_id, t.package_id)
+    db.delete(t)
+    db.add(models.RevokedTicket(code=code))
+    db.commit()
+    svc.revoked.add(code)
+    publish_availability(svc, t.event_id, t.package_id)
+    pin_to_primary(svc, user)
+    return {"refunded": True, "code": code}
+
+@router.post("/validate/ticket", response_model=schemas.ValidateTicketOut)
+async def validate_ticket(body: schemas.ValidateTicketIn, db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    results = await validation.validate_codes(svc.revoked, db, [body.code])
+    return {"valid": results[body.code]}
+
+@router.post("/validate/tickets", response_model=schemas.ValidateTicketsOut)
+async def validate_tickets(body: schemas.ValidateTicketsIn, db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    return {"results": await validation.validate_codes(svc.revoked, db, body.codes)}
+
+# feed of refunded codes for scanners that validate offline. Codes from the last
+# validation.OVERLAP seqs before `since` are sent again (a refund may commit after a
+# higher seq was served), so scanners treat the feed as a set. The overlap holds at most
+# OVERLAP rows, so `limit` new rows always fit after it and last_seq keeps advancing.
+@router.get("/validate/revocations", response_model=schemas.RevocationsOut)
+async def list_revocations(since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=10000),
+                           db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    rows = (await db.execute(
+        select(models.RevokedTicket.seq, models.RevokedTicket.code)
+        .where(models.RevokedTicket.seq > since - validation.OVERLAP)
+        .order_by(models.RevokedTicket.seq).limit(limit + validation.OVERLAP)
+    )).all()
+    return {"codes": [code for _, code in rows], "last_seq": max(rows[-1][0], since) if rows else since}
+
+# Live availability (Server-Sent Events): a snapshot, then one message per change,
+# coalesced per tick; `: ping` comments keep idle connections open through proxies
+@router.get("/availability/stream")
+async def availability_stream(events: Optional[str] = Query(None, pattern=r"^\d+(,\d+)*$"),
+                              packages: Optional[str] = Query(None, pattern=r"^\d+(,\d+)*$"),
+                              user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    keys = availability.parse_ids("event", events) | availability.parse_ids("package", packages)
+    if not keys:
+        raise HTTPException(status_code=400, detail="Provide events or packages")
+    if len(keys) > availability.MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {availability.MAX_IDS} ids per stream")
+    try:
+        sub = await svc.broadcaster.subscribe(keys)
+    except availability.UnknownIds as e:
+        raise HTTPException(status_code=404, detail=f"Not found: {e}")
+    return StreamingResponse(svc.broadcaster.stream(sub), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # Relații: eveniment <-> pachet
-@app.get("/events/{event_id}/event-packets", response_model=List[schemas.PackageOut])
-def get_event_packages(event_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    packages = db.query(models.Package).join(models.PackageEvent).filter(models.PackageEvent.event_id == event_id).all()
-    return packages
+@router.get("/events/{event_id}/event-packets", response_model=List[schemas.PackageOut])
+async def get_event_packages(request: Request, event_id: int, embed: Optional[str] = Query(None, pattern=EMBED_PATTERN),
+                             db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    cached = await cached_page(svc, request, db)
+    if cached:
+        return cached
+    query, adapter, columns = embed_events(select(models.Package).join(models.PackageEvent).where(models.PackageEvent.event_id == event_id), embed)
+    body, _ = await fetch_rows(db, query, adapter, columns)
+    return await svc.catalog_cache.put(request, body)
 
-@app.get("/event-packets/{package_id}/events", response_model=List[schemas.EventOut])
-def get_package_events(package_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    events = db.query(models.Event).join(models.PackageEvent).filter(models.PackageEvent.package_id == package_id).all()
-    return events
+@router.get("/event-packets/{package_id}/events", response_model=List[schemas.EventOut])
+async def get_package_events(request: Request, package_id: int, db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user), svc: Services = Depends(get_services)):
+    cached = await cached_page(svc, request, db)
+    if cached:
+        return cached
+    query = select(models.Event).join(models.PackageEvent).where(models.PackageEvent.package_id == package_id)
+    body, _ = await fetch_rows(db, query, EVENT_LIST, EVENT_COLUMNS)
+    return await svc.catalog_cache.put(request, body)
 
 # Relații: bilete pentru eveniment/pachet
-@app.get("/events/{event_id}/tickets/{ticket_id}", response_model=schemas.TicketOut)
-def get_event_ticket(event_id: int, ticket_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    ticket = db.query(models.Ticket).filter(models.Ticket.event_id == event_id, models.Ticket.code == ticket_id).first()
+@router.get("/events/{event_id}/tickets/{ticket_id}", response_model=schemas.TicketOut)
+async def get_event_ticket(event_id: int, ticket_id: str, db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user)):
+    query = select(models.Ticket).where(models.Ticket.event_id == event_id, models.Ticket.code == ticket_id)
+    ticket = await db.scalar(query)
+    if not ticket and event_db.on_replica(db):
+        # bought moments ago, maybe by another caller: not on the replica yet
+        async with event_db.primary_of(db) as primary:
+            ticket = await primary.scalar(query)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
 
-@app.get("/event-packets/{package_id}/tickets/{ticket_id}", response_model=schemas.TicketOut)
-def get_package_ticket(package_id: int, ticket_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    ticket = db.query(models.Ticket).filter(models.Ticket.package_id == package_id, models.Ticket.code == ticket_id).first()
+@router.get("/event-packets/{package_id}/tickets/{ticket_id}", response_model=schemas.TicketOut)
+async def get_package_ticket(package_id: int, ticket_id: str, db: AsyncSession = Depends(get_read_db), user=Depends(get_current_user)):
+    query = select(models.Ticket).where(models.Ticket.package_id == package_id, models.Ticket.code == ticket_id)
+    ticket = await db.scalar(query)
+    if not ticket and event_db.on_replica(db):
+        # bought moments ago, maybe by another caller: not on the replica yet
+        async with event_db.primary_of(db) as primary:
+            ticket = await primary.scalar(query)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
 
 # Paginare și filtrare avansată pentru pachete
-@app.get("/event-packets", response_model=List[schemas.PackageOut])
-def list_event_packets(
+@router.get("/event-packets", response_model=List[schemas.PackageOut])
+async def list_event_packets(
+    request: Request,
     page: int = Query(1, ge=1),
-    items_per_page: int = Query(10, ge=1),
-    available_tickets: Optional[int] = None,
+    items_per_page: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    available_tickets: Optional[int] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN),
     type: Optional[str] = None,
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user)
+    embed: Optional[str] = Query(None, pattern=EMBED_PATTERN),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(get_current_user),
+    svc: Services = Depends(get_services)
 ):
-    query = db.query(models.Package)
-    if type:
-        like = f"%{type.lower()}%"
-        query = query.filter(func.lower(models.Package.description).like(like))
-    if available_tickets is not None:
-        # numărul de bilete disponibile = seats - bilete vândute
-        query = query.outerjoin(models.Ticket, models.Package.id == models.Ticket.package_id)
-        query = query.group_by(models.Package.id)
-        query = query.having((models.Package.seats - func.count(models.Ticket.code)) >= available_tickets)
-    # paginare
-    return query.offset((page - 1) * items_per_page).limit(items_per_page).all()
-
-@app.get("/health")
+    cached = await cached_page(svc, request, db)
+    if cached:
+        return cached
+    query, key = search.packages(type=type, fts=svc.db.fts)
+    query, adapter, columns = embed_events(query, embed)
+    # numărul de bilete disponibile = seats - bilete vândute, ținut în coloana `remaining`
+    query, sort_col, descending = filter_available(query, models.Package, available_tickets, sort)
+    # paginare: cursor (keyset) sau page (compatibilitate)
+    body, rows = await fetch_rows(db, paginate(query, key, cursor, page, items_per_page, sort_col, descending), adapter, columns)
+    return await svc.catalog_cache.put(request, body, next_cursor(rows, items_per_page, "available_tickets" if sort else None))
+
+# Owner listings: what the caller created, newest ids last, keyset pages (not cached, per user)
+@router.get("/me/events", response_model=List[schemas.EventOut])
+async def my_events(page: int = Query(1, ge=1),
+                    items_per_page: int = Query(10, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                    db: AsyncSession = Depends(get_read_db), user=Depends(require_role("owner-event"))):
+    query = select(models.Event).where(models.Event.id_owner == ensure_owner(user))
+    body, rows = await fetch_rows(db, paginate(query, models.Event.id, cursor, page, items_per_page), EVENT_LIST, EVENT_COLUMNS)
+    return page_response(body, next_cursor(rows, items_per_page))
+
+@router.get("/me/event-packets", response_model=List[schemas.PackageOut])
+async def my_packages(page: int = Query(1, ge=1),
+                      items_per_page: int = Query(10, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                      db: AsyncSession = Depends(get_read_db), user=Depends(require_role("owner-event"))):
+    query = select(models.Package).where(models.Package.id_owner == ensure_owner(user))
+    body, rows = await fetch_rows(db, paginate(query, models.Package.id, cursor, page, items_per_page), PACKAGE_LIST, PACKAGE_COLUMNS)
+    return page_response(body, next_cursor(rows, items_per_page))
+
+@router.get("/health")
 def health():
     return {"ok": True}
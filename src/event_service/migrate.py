@@ -0,0 +1,39 @@
+from sqlalchemy import inspect, text
+from event_service import db as event_db
+from event_service.db import Base, SessionLocal
+from event_service import models, search  # noqa: F401  (registers tables and the FTS after_create hook)
+from event_service.inventory import rebuild_counters
+
+# Schema management for the event database.
+# Runs once per deployment, before any worker starts (run_event.py does it by
+# default, or `python -m event_service.migrate`), never at import time: with
+# several worker processes or nodes every import would race on the same DDL.
+# Safe to re-run; it only adds what is missing.
+
+def migrate(bind=None) -> None:
+    bind = bind or event_db.engine
+    Base.metadata.create_all(bind=bind)
+    insp = inspect(bind)
+    with bind.begin() as conn:
+        # seat inventory columns on databases created before they existed
+        for table in ("events", "packages"):
+            cols = {c["name"] for c in insp.get_columns(table)}
+            if "sold" not in cols:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN sold INTEGER NOT NULL DEFAULT 0"))
+            if "remaining" not in cols:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN remaining INTEGER"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        search.install(conn)
+
+def rebuild() -> None:
+    db = SessionLocal()
+    try:
+        rebuild_counters(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate()
+    print("Event DB migrated!")
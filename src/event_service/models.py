@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Float, Index, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship, synonym
 from event_service.db import Base
 
 class Event(Base):
     __tablename__ = "events"
     id = Column(Integer, primary_key=True)
-    id_owner = Column(Integer, nullable=False)  # owner user id, optional mapping by email in demo
+    id_owner = Column(Integer, nullable=False)  # auth service user id (token `uid` claim)
     name = Column(String, nullable=False, unique=True)
     location = Column(String, nullable=True)
     description = Column(String, nullable=True)
-    seats = Column(Integer, nullable=True)
+    seats = Column(Integer, nullable=True, index=True)
+    # seat inventory, maintained by event_service.inventory (remaining is NULL when seats is NULL)
+    sold = Column(Integer, nullable=False, default=0, server_default="0")
+    remaining = Column(Integer, nullable=True, index=True)
+    available_tickets = synonym("remaining")  # API name; cursors read it from ORM objects and column rows alike
+    # "my events": owner lookup already in id order, so keyset pages are index range scans
+    __table_args__ = (Index("ix_events_id_owner_id", "id_owner", "id"),)
 
 class Package(Base):
     __tablename__ = "packages"
@@ -18,16 +24,52 @@ class Package(Base):
     name = Column(String, nullable=False, unique=True)
     location = Column(String, nullable=True)
     description = Column(String, nullable=True)
-    seats = Column(Integer, nullable=True)  # seats for the package (<= min of events seats)
+    seats = Column(Integer, nullable=True, index=True)  # seats for the package (<= min of events seats)
+    sold = Column(Integer, nullable=False, default=0, server_default="0")
+    remaining = Column(Integer, nullable=True, index=True)
+    available_tickets = synonym("remaining")
+    # only loaded on request (selectinload), never lazily per package
+    events = relationship("Event", secondary="package_events", lazy="raise", order_by="Event.id")
+    __table_args__ = (Index("ix_packages_id_owner_id", "id_owner", "id"),)
 
 class PackageEvent(Base):
     __tablename__ = "package_events"
     package_id = Column(Integer, ForeignKey("packages.id"), primary_key=True)
-    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True, index=True)
     __table_args__ = (UniqueConstraint("package_id", "event_id", name="uq_pack_event"),)
 
 class Ticket(Base):
     __tablename__ = "tickets"
     code = Column(String, primary_key=True)
-    package_id = Column(Integer, ForeignKey("packages.id"), nullable=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=True)
+    package_id = Column(Integer, ForeignKey("packages.id"), nullable=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=True, index=True)
+
+class RevokedTicket(Base):
+    # refunded tickets; `seq` orders the revocation delta feed
+    __tablename__ = "revoked_tickets"
+    seq = Column(Integer, primary_key=True)
+    code = Column(String, nullable=False, unique=True)
+
+class WaitingRoom(Base):
+    # purchases for this event need an admission token (event_service.waiting_room);
+    # next_at is the epoch time of the next free admission slot
+    __tablename__ = "waiting_rooms"
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    rate = Column(Float, nullable=False)  # admissions per second
+    next_at = Column(Float, nullable=False, default=0.0, server_default="0")
+
+class WaitingRoomEntry(Base):
+    # a buyer's place in a waiting room; joining again returns it instead of a new slot
+    # until its admission is spent or expires
+    __tablename__ = "waiting_room_entries"
+    event_id = Column(Integer, ForeignKey("waiting_rooms.event_id"), primary_key=True)
+    sub = Column(String, primary_key=True)
+    admit_at = Column(Float, nullable=False)
+    jti = Column(String, nullable=False)
+    expires_at = Column(Integer, nullable=False, index=True)
+
+class UsedAdmission(Base):
+    # admission tokens already spent on a purchase (kept until they expire)
+    __tablename__ = "used_admissions"
+    jti = Column(String, primary_key=True)
+    expires_at = Column(Integer, nullable=False, index=True)
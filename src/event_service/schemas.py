@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 
 class EventIn(BaseModel):
     name: str
@@ -10,6 +10,7 @@ class EventIn(BaseModel):
 class EventOut(EventIn):
     id: int
     id_owner: int
+    available_tickets: Optional[int] = Field(None, validation_alias="remaining")  # None = no seat limit
     class Config:
         from_attributes = True
 
@@ -27,13 +28,35 @@ class PackageOut(BaseModel):
     location: Optional[str] = None
     description: Optional[str] = None
     seats: Optional[int] = None
+    available_tickets: Optional[int] = Field(None, validation_alias="remaining")
     class Config:
         from_attributes = True
 
+class PackageDetailOut(PackageOut):
+    events: List[EventOut] = []
+
+class WaitingRoomIn(BaseModel):
+    rate: float = Field(..., gt=0, le=10000)  # admissions per second
+
+class WaitingRoomOut(WaitingRoomIn):
+    event_id: int
+    wait_seconds: float  # how long a buyer joining now would wait
+
+class AdmissionOut(BaseModel):
+    admission_token: str
+    admit_at: float  # epoch seconds; send the token as X-Admission-Token from then on
+    wait_seconds: float
+
 class TicketIn(BaseModel):
     package_id: Optional[int] = None
     event_id: Optional[int] = None
 
+class TicketBatchItem(TicketIn):
+    quantity: int = Field(1, ge=1, le=100)
+
+class TicketBatchIn(BaseModel):
+    items: List[TicketBatchItem] = Field(..., min_length=1, max_length=100)
+
 class TicketOut(BaseModel):
     code: str
     package_id: Optional[int] = None
@@ -44,3 +67,16 @@ class ValidateTicketIn(BaseModel):
 
 class ValidateTicketOut(BaseModel):
     valid: bool
+
+class ValidateTicketsIn(BaseModel):
+    codes: List[str] = Field(..., max_length=5000)
+
+class ValidateTicketsOut(BaseModel):
+    results: Dict[str, bool]
+
+class RevocationsOut(BaseModel):
+    codes: List[str]
+    last_seq: int
+
+class ImportOut(BaseModel):
+    imported: int
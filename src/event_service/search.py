@@ -0,0 +1,78 @@
+from typing import Optional
+from sqlalchemy import event, func, select, text
+from sqlalchemy.sql import table, column
+from event_service.db import Base
+from event_service import models
+
+# Full-text search over events/packages (name, location, description).
+# On SQLite the text columns are mirrored into external-content FTS5 tables with
+# the trigram tokenizer, so the existing case-insensitive substring filters become
+# index lookups instead of table scans. Triggers keep the index in sync with every
+# INSERT/UPDATE/DELETE on the base tables. Other databases keep the LIKE filters.
+
+MIN_TERM = 3  # trigram index needs at least 3 characters
+
+_FTS_TABLES = {"events": "events_fts", "packages": "packages_fts"}
+_COLUMNS = "name, location, description"
+
+def _ddl(base: str, fts: str):
+    new = "new.name, new.location, new.description"
+    old = "old.name, old.location, old.description"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({_COLUMNS}, content='{base}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {base} BEGIN "
+        f"INSERT INTO {fts}(rowid, {_COLUMNS}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {_COLUMNS} ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {_COLUMNS}) VALUES (new.id, {new}); END",
+        # index rows that existed before the FTS table was created
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def install(conn) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    for base, fts in _FTS_TABLES.items():
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"), {"n": fts}).first()
+        if exists:
+            continue
+        for stmt in _ddl(base, fts):
+            conn.execute(text(stmt))
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    install(connection)
+
+def _fts(name: str):
+    return table(name, column("rowid"), column(name))
+
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _search(model, fts_name: str, terms, fts: bool):
+    # Builds SELECT model filtered by case-insensitive substring matches.
+    # Returns (query, key): callers order and page by `key`, which is the FTS rowid
+    # when the index is used so SQLite can stream matches in id order and stop at LIMIT.
+    query, key = select(model), model.id
+    matches = []
+    for col, value in terms:
+        if not value:
+            continue
+        if fts and len(value) >= MIN_TERM:
+            matches.append(f"{col.key} : {_phrase(value)}")
+        else:
+            query = query.where(func.lower(col).like(f"%{value.lower()}%"))
+    if matches:
+        table = _fts(fts_name)
+        query = query.join(table, table.c.rowid == model.id).where(table.c[fts_name].op("MATCH")(" AND ".join(matches)))
+        key = table.c.rowid
+    return query, key
+
+# fts: the database has the FTS5 tables (Database.fts)
+def events(q: Optional[str] = None, loc: Optional[str] = None, fts: bool = True):
+    return _search(models.Event, "events_fts", [(models.Event.name, q), (models.Event.location, loc)], fts)
+
+def packages(type: Optional[str] = None, fts: bool = True):
+    return _search(models.Package, "packages_fts", [(models.Package.description, type)], fts)
@@ -0,0 +1,126 @@
+import hashlib
+import math
+import os
+import time
+from typing import Dict, Iterable, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from common.security import CODE_VALUE_RE, verify_signed_code
+from event_service import models
+from event_service.db import on_replica, primary_of
+
+# Ticket validation without a per-scan database lookup.
+# Ticket codes are signed (common.security.sign_code), so a code with a valid
+# signature was issued by us. The only thing left to check is whether it was
+# refunded: revoked codes are kept in a Bloom filter that is topped up from the
+# revoked_tickets delta feed, and only Bloom hits (revoked or false positive)
+# and legacy unsigned codes go to the database.
+
+REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "1.0"))
+BLOOM_CAPACITY = int(os.getenv("REVOCATION_CAPACITY", "100000"))
+BLOOM_ERROR_RATE = 0.01
+# Sequence values are taken when a refund inserts its row, not when it commits, so on
+# Postgres a refund can become visible after rows with a higher seq were already read.
+# Every read of the feed therefore goes back OVERLAP seqs behind the last one seen.
+OVERLAP = int(os.getenv("REVOCATION_OVERLAP", "1000"))
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class RevocationSet:
+    def __init__(self, capacity: int = BLOOM_CAPACITY):
+        self.bloom = BloomFilter(capacity)
+        self.last_seq = 0
+        self._seen = set()  # seqs already added that the next overlapping read returns again
+        self._local = set()  # codes add()ed here that the feed has not returned yet
+        self._next_refresh = 0.0
+
+    def add(self, code: str) -> None:
+        # local refunds show up at once; last_seq only moves in refresh() so
+        # refunds committed by other workers are never skipped
+        if code not in self._local:
+            self._local.add(code)
+            self.bloom.add(code)
+
+    def might_contain(self, code: str) -> bool:
+        return code in self.bloom
+
+    async def refresh(self, db: AsyncSession) -> None:
+        # at most once per REFRESH_SECONDS; picks up refunds made by other workers
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + REFRESH_SECONDS
+        rows = (await db.execute(
+            select(models.RevokedTicket.seq, models.RevokedTicket.code)
+            .where(models.RevokedTicket.seq > self.last_seq - OVERLAP)
+            .order_by(models.RevokedTicket.seq)
+        )).all()
+        rows = [(seq, code) for seq, code in rows if seq not in self._seen]
+        if self.bloom.count + len(rows) > self.bloom.capacity:
+            # filter is full, rebuild it larger from the whole table
+            rows = (await db.execute(select(models.RevokedTicket.seq, models.RevokedTicket.code))).all()
+            self.bloom = BloomFilter(max(self.bloom.capacity, len(rows)) * 2)
+            self._seen, self._local = set(), set()
+        for seq, code in rows:
+            if code in self._local:
+                self._local.discard(code)  # already in the filter and counted
+            else:
+                self.bloom.add(code)
+            self.last_seq = max(self.last_seq, seq)
+        floor = self.last_seq - OVERLAP
+        self._seen = {seq for seq in self._seen if seq > floor} | {seq for seq, _ in rows if seq > floor}
+
+async def validate_codes(revoked: RevocationSet, db: AsyncSession, codes: Iterable[str]) -> Dict[str, bool]:
+    # db may be a read replica: the refund feed and Bloom hits are read from the primary,
+    # so a refund is never missed because of replication lag, and unsigned codes the
+    # replica does not know yet are looked up there too
+    async with primary_of(db) as primary:
+        await revoked.refresh(primary)
+        results: Dict[str, bool] = {}
+        legacy: List[str] = []
+        suspects: List[str] = []
+        for code in codes:
+            if verify_signed_code(code) is not None:
+                if revoked.might_contain(code):
+                    suspects.append(code)
+                else:
+                    results[code] = True
+            elif "." in code and not CODE_VALUE_RE.fullmatch(code.rpartition(".")[0]):
+                results[code] = False  # not a code we issue
+            else:
+                # issued before tickets were signed, or signed before codes had a domain
+                # label (those signatures prove nothing now): only the tickets table counts
+                legacy.append(code)
+        if suspects:
+            rows = await primary.scalars(select(models.RevokedTicket.code).where(models.RevokedTicket.code.in_(suspects)))
+            gone = set(rows.all())
+            results.update({code: code not in gone for code in suspects})
+        if legacy:
+            rows = await db.scalars(select(models.Ticket.code).where(models.Ticket.code.in_(legacy)))
+            found = set(rows.all())
+            missing = [code for code in legacy if code not in found]
+            if missing and on_replica(db):
+                rows = await primary.scalars(select(models.Ticket.code).where(models.Ticket.code.in_(missing)))
+                found.update(rows.all())
+            results.update({code: code in found for code in legacy})
+    return results
@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import math
+import os
+import secrets
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from common.security import ADMISSION_WINDOW_SECONDS, TokenError, TokenNotYetValid, create_admission_token, verify_token
+from event_service import models
+
+# Waiting rooms: admission control in front of ticket purchases for busy on-sales.
+# An event with a waiting room only sells to buyers holding an admission token.
+# Joining the queue hands out the next admission slot: slots are spaced 1/rate
+# seconds apart, in join order, and the token is valid from its slot for
+# ADMISSION_WINDOW_SECONDS. The schedule lives in the waiting_rooms row
+# (next_at = next free slot), so every worker draws from the same queue.
+# Each buyer holds one place per room (waiting_room_entries): joining again hands
+# back the same slot and token id until that admission is spent or expires.
+#
+# Joins arriving within JOIN_TICK_MS are coalesced into one UPDATE per event, so a
+# crowd joining at once costs a few writes instead of one per buyer.
+
+JOIN_TICK_MS = float(os.getenv("WAITING_ROOM_JOIN_TICK_MS", "5"))
+PRUNE_SECONDS = 60.0
+
+class AdmissionError(Exception): ...
+class NotAdmitted(AdmissionError): ...
+class AdmissionUsed(AdmissionError): ...
+
+class TooEarly(AdmissionError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+Admission = Tuple[float, str]  # (slot, token id)
+
+class Joiner:
+    def __init__(self, database):
+        self.database = database  # event_service.db.Database
+        self._pending: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+
+    async def join(self, event_id: int, sub: str) -> Optional[Admission]:
+        # the caller's admission, or None when the event has no waiting room
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(event_id, []).append((sub, future))
+        if self._task is None or self._task.done():
+            # fresh context: the batch's queries belong to no single request's metrics
+            self._task = asyncio.get_running_loop().create_task(self._flush(), context=contextvars.Context())
+        return await future
+
+    async def _flush(self) -> None:
+        # joins arriving while a batch is being written go into the next batch
+        while self._pending:
+            await asyncio.sleep(JOIN_TICK_MS / 1000)
+            batch, self._pending = self._pending, {}
+            try:
+                # subs in join order, each once: a buyer joining twice in one batch gets one slot
+                joins = {event_id: list(dict.fromkeys(sub for sub, _ in waiters)) for event_id, waiters in batch.items()}
+                admissions = await run_in_threadpool(self._take_slots_retrying, joins)
+            except Exception as e:
+                for waiters in batch.values():
+                    for _, future in waiters:
+                        future.set_exception(e)
+                continue
+            for event_id, waiters in batch.items():
+                held = admissions.get(event_id, {})
+                for sub, future in waiters:
+                    future.set_result(held.get(sub))
+
+    def _take_slots_retrying(self, joins: Dict[int, List[str]]) -> Dict[int, Dict[str, Admission]]:
+        # another worker entering the same buyer first fails our insert; the retry finds its entry
+        for attempt in range(3):
+            try:
+                return self._take_slots(joins)
+            except IntegrityError:
+                if attempt == 2:
+                    raise
+
+    def _take_slots(self, joins: Dict[int, List[str]]) -> Dict[int, Dict[str, Admission]]:
+        # One transaction. A buyer who already holds an admission that is neither spent nor
+        # expired gets it back; the others take the next slots, one UPDATE per event.
+        # next_at never falls behind now, so an idle room does not bank admissions for a burst.
+        now = time.time()
+        admissions = {}
+        db = self.database.SessionLocal()
+        try:
+            for event_id, subs in sorted(joins.items()):
+                if db.get(models.WaitingRoom, event_id) is None:
+                    continue
+                entries = {e.sub: e for e in db.scalars(select(models.WaitingRoomEntry).where(
+                    models.WaitingRoomEntry.event_id == event_id, models.WaitingRoomEntry.sub.in_(subs)))}
+                spent = set(db.scalars(select(models.UsedAdmission.jti).where(
+                    models.UsedAdmission.jti.in_([e.jti for e in entries.values()])))) if entries else set()
+                held = {sub: (e.admit_at, e.jti) for sub, e in entries.items() if e.expires_at > now and e.jti not in spent}
+                new = [sub for sub in subs if sub not in held]
+                if new:
+                    n = len(new)
+                    start = case((models.WaitingRoom.next_at > now, models.WaitingRoom.next_at), else_=now)
+                    row = db.execute(
+                        update(models.WaitingRoom)
+                        .where(models.WaitingRoom.event_id == event_id)
+                        .values(next_at=start + n / models.WaitingRoom.rate)
+                        .returning(models.WaitingRoom.next_at, models.WaitingRoom.rate)
+                    ).first()
+                    if row is None:  # room removed meanwhile
+                        continue
+                    end, rate = row
+                    for i, sub in enumerate(new):
+                        slot, jti = end - (n - i) / rate, secrets.token_urlsafe(16)
+                        entry = entries.get(sub) or models.WaitingRoomEntry(event_id=event_id, sub=sub)
+                        entry.admit_at, entry.jti, entry.expires_at = slot, jti, int(slot) + ADMISSION_WINDOW_SECONDS
+                        db.add(entry)
+                        held[sub] = (slot, jti)
+                admissions[event_id] = held
+            if now - self._pruned_at > PRUNE_SECONDS:
+                self._pruned_at = now
+                db.execute(delete(models.UsedAdmission).where(models.UsedAdmission.expires_at < now))
+                db.execute(delete(models.WaitingRoomEntry).where(models.WaitingRoomEntry.expires_at < now))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return admissions
+
+async def join(joiner: Joiner, sub: str, event_id: int) -> Optional[Tuple[str, float]]:
+    # joining again while holding an admission returns the same slot and token id
+    admission = await joiner.join(event_id, sub)
+    if admission is None:
+        return None
+    slot, jti = admission
+    return create_admission_token(sub, event_id, slot, jti=jti), slot
+
+def check(db: Session, sub: str, event_ids: Iterable[int], package_ids: Iterable[int], token: Optional[str]) -> None:
+    # Inside the purchase transaction: a purchase touching an event with a waiting room
+    # (directly or through a package) needs an admission token for that event, spent here.
+    # A token admits to one event, so a purchase may touch at most one gated event.
+    event_ids, package_ids = [i for i in event_ids if i], [i for i in package_ids if i]
+    if not event_ids and not package_ids:
+        return
+    in_package = select(models.PackageEvent.event_id).where(models.PackageEvent.package_id.in_(package_ids))
+    gated = set(db.scalars(select(models.WaitingRoom.event_id).where(
+        or_(models.WaitingRoom.event_id.in_(event_ids), models.WaitingRoom.event_id.in_(in_package))
+    )))
+    if not gated:
+        return
+    if len(gated) > 1:
+        raise NotAdmitted("A purchase may cover only one event with a waiting room")
+    if not token:
+        raise NotAdmitted("This event has a waiting room, join the queue first")
+    try:
+        claims = verify_token(token, typ="admission")
+    except TokenNotYetValid as e:
+        raise TooEarly("Not your turn yet", retry_after=max(1, math.ceil(e.not_before - time.time())))
+    except TokenError as e:
+        raise NotAdmitted(f"Admission token: {e}")
+    if claims.get("sub") != sub or claims.get("evt") not in gated:  # gated holds one event
+        raise NotAdmitted("Admission token is for another buyer or event")
+    db.add(models.UsedAdmission(jti=claims["jti"], expires_at=claims["exp"]))
+    try:
+        db.flush()
+    except IntegrityError:
+        raise AdmissionUsed("Admission token already used")
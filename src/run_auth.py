@@ -1,3 +1,12 @@
+import os
 import uvicorn
+from auth_service.db import engine
+from auth_service.migrate import migrate
+
+MIGRATE_ON_START = os.getenv("MIGRATE_ON_START", "1") == "1"
+
 if __name__ == "__main__":
-    uvicorn.run("auth_service.main:app", host="0.0.0.0", port=8000, reload=False)
+    if MIGRATE_ON_START:
+        migrate()
+        engine.dispose()
+    uvicorn.run("auth_service.main:create_app", factory=True, host="0.0.0.0", port=8000, reload=False)
@@ -1,3 +1,3 @@
 import uvicorn
 if __name__ == "__main__":
-    uvicorn.run("client_service.main:app", host="0.0.0.0", port=8002, reload=False)
+    uvicorn.run("client_service.main:create_app", factory=True, host="0.0.0.0", port=8002, reload=False)
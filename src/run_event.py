@@ -1,3 +1,16 @@
+import os
 import uvicorn
+from event_service.db import engine
+from event_service.migrate import migrate
+
+# WEB_CONCURRENCY worker processes share the port; each one has its own connection
+# pools (DB_POOL_SIZE/DB_MAX_OVERFLOW). Seat reservations stay correct across
+# workers and nodes because they are conditional UPDATEs in the database.
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+MIGRATE_ON_START = os.getenv("MIGRATE_ON_START", "1") == "1"
+
 if __name__ == "__main__":
-    uvicorn.run("event_service.main:app", host="0.0.0.0", port=8001, reload=False)
+    if MIGRATE_ON_START:
+        migrate()
+        engine.dispose()  # workers open their own connections
+    uvicorn.run("event_service.main:create_app", factory=True, host="0.0.0.0", port=int(os.getenv("PORT", "8001")), workers=WORKERS, reload=False)
@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Benchmark harness for the three services, run in-process (httpx + ASGI transport).
+# Seeds a scratch database (kept with --db-dir so large datasets are built once),
+# then drives one scenario per endpoint group and reports requests, errors,
+# throughput and p50/p99 latency:
+#
+#   onsale  POST /tickets burst for one event with a fixed number of seats
+#   browse  GET /events: plain pages, search terms, availability sort, cursor follow-ups
+#   scan    POST /validate/ticket with seeded codes (and some forged ones)
+#   login   POST /auth/login for seeded users
+#   client  GET /clients/me/tickets and ticket details (needs a reachable MONGO_URL)
+#
+# Results are written to --save as JSON; --baseline compares against an earlier
+# run and exits 1 when a scenario regressed by more than --tolerance.
+#
+#   python bench.py --events 1000000 --tickets 10000000 --db-dir /data/bench
+#   python bench.py --db-dir /data/bench --baseline bench_results/<earlier>.json
+
+SCENARIOS = ["onsale", "browse", "scan", "login", "client"]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--events", type=int, default=10_000)
+parser.add_argument("--tickets", type=int, default=100_000)
+parser.add_argument("--users", type=int, default=1_000)
+parser.add_argument("--db-dir", default=None, help="reuse the seeded databases in this directory")
+parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+parser.add_argument("--requests", type=int, default=5_000, help="requests per scenario")
+parser.add_argument("--concurrency", type=int, default=64)
+parser.add_argument("--onsale-seats", type=int, default=None, help="default: 80%% of --requests, so the burst sells out")
+parser.add_argument("--save", default="bench_results")
+parser.add_argument("--baseline", default=None, help="earlier result file to compare with")
+parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+args = parser.parse_args()
+if args.onsale_seats is None:
+    args.onsale_seats = int(args.requests * 0.8)
+
+db_dir = args.db_dir or tempfile.mkdtemp()
+os.makedirs(db_dir, exist_ok=True)
+# the auth and event services both read DATABASE_URL; their tables do not overlap
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+os.environ.setdefault("MONGO_DB", "pos_client_bench")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from sqlalchemy import func, insert, select
+from common.security import create_access_token, sign_code
+from event_service.db import SessionLocal
+from event_service.inventory import rebuild_counters
+from event_service.migrate import migrate
+from event_service import models
+from event_service.main import create_app as create_event_app
+from auth_service.db import SessionLocal as AuthSessionLocal
+from auth_service.migrate import migrate as migrate_auth
+from auth_service.models import User
+from auth_service.main import create_app as create_auth_app
+from auth_service import utils
+
+KINDS = ["Concert", "Festival", "Teatru", "Conferinta", "Opera", "Stand-up", "Expozitie", "Meci"]
+STYLES = ["rock", "jazz", "clasic", "pop", "folk", "electronic", "hip-hop", "blues"]
+CITIES = [f"Oras {i}" for i in range(500)] + ["Sala Polivalenta", "Teatrul National", "Hotel Central"]
+BATCH = 50_000
+PASSWORD = "bench-password"
+
+event_app = create_event_app()
+auth_app = create_auth_app()
+
+def seed():
+    migrate()
+    migrate_auth()
+    rnd = random.Random(42)
+    db = SessionLocal()
+    have = db.scalar(select(func.count(models.Event.id)))
+    t0 = time.perf_counter()
+    seats = max(100, 2 * args.tickets // max(1, args.events))
+    for start in range(have, args.events, BATCH):
+        db.execute(insert(models.Event), [{
+            "id_owner": rnd.randint(1, 5000),
+            "name": f"{rnd.choice(KINDS)} {rnd.choice(STYLES)} #{i}",
+            "location": rnd.choice(CITIES),
+            "description": f"{rnd.choice(STYLES)} {rnd.choice(KINDS).lower()} night",
+            "seats": seats,
+            "remaining": seats,
+        } for i in range(start, min(start + BATCH, args.events))])
+        db.commit()
+    have_tickets = db.scalar(select(func.count(models.Ticket.code)))
+    for start in range(have_tickets, args.tickets, BATCH):
+        db.execute(insert(models.Ticket), [
+            {"code": sign_code(f"{i:012x}"), "event_id": rnd.randint(1, args.events)}
+            for i in range(start, min(start + BATCH, args.tickets))
+        ])
+        db.commit()
+    if have < args.events or have_tickets < args.tickets:
+        rebuild_counters(db)
+    db.close()
+
+    auth = AuthSessionLocal()
+    have_users = auth.scalar(select(func.count(User.id)))
+    password_hash = utils.hash_password(PASSWORD)
+    for start in range(have_users, args.users, BATCH):
+        auth.execute(insert(User), [
+            {"email": f"user{i}@bench.example.com", "password_hash": password_hash, "role": "client"}
+            for i in range(start, min(start + BATCH, args.users))
+        ])
+        auth.commit()
+    auth.close()
+    print(f"dataset: {args.events} events, {args.tickets} tickets, {args.users} users in {db_dir} "
+          f"(seeded in {time.perf_counter() - t0:.1f}s)")
+
+def auth_header(sub: str, role: str, uid: int = 1) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(sub, role, uid=uid)}"}
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else None
+
+async def drive(client: httpx.AsyncClient, requests, ok_status=(200,)):
+    # requests: list of (method, url, kwargs); `concurrency` workers pull from it
+    latencies, errors, statuses = [], 0, {}
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, url, kwargs in queue:
+            t0 = time.perf_counter()
+            r = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - t0)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+            if r.status_code not in ok_status:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pct(latencies, 0.50), 3),
+        "p99_ms": round(pct(latencies, 0.99), 3),
+    }
+
+def asgi_client(app, base_url: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url, limits=limits, timeout=60)
+
+async def onsale(events):
+    owner = auth_header("owner@bench.example.com", "owner-event")
+    r = await events.post("/events", json={"name": f"On sale {time.time()}", "seats": args.onsale_seats}, headers=owner)
+    r.raise_for_status()
+    event_id = r.json()["id"]
+    buyer = auth_header("buyer@bench.example.com", "client")
+    # sold-out answers (400) are expected once the seats are gone
+    result = await drive(events, [("POST", "/tickets", {"json": {"event_id": event_id}, "headers": buyer})] * args.requests, (200, 400))
+    db = SessionLocal()
+    issued = db.scalar(select(func.count(models.Ticket.code)).where(models.Ticket.event_id == event_id))
+    db.close()
+    result["oversold"] = issued > args.onsale_seats
+    return result
+
+async def browse(events):
+    rnd = random.Random(7)
+    user = auth_header("browser@bench.example.com", "client")
+    first = await events.get("/events", params={"items_per_page": 20}, headers=user)
+    cursor = first.headers.get("X-Next-Cursor")
+    mix = [
+        lambda: {"page": rnd.randint(1, 50)},
+        lambda: {"q": rnd.choice(STYLES)},
+        lambda: {"loc": rnd.choice(CITIES)},
+        lambda: {"q": f"#{rnd.randint(0, args.events - 1)}"},
+        lambda: {"sort": "-available_tickets"},
+        lambda: {"cursor": cursor} if cursor else {},
+    ]
+    reqs = [("GET", "/events", {"params": {"items_per_page": 20, **rnd.choice(mix)()}, "headers": user})
+            for _ in range(args.requests)]
+    return await drive(events, reqs)
+
+async def scan(events):
+    rnd = random.Random(11)
+    db = SessionLocal()
+    codes = db.scalars(select(models.Ticket.code).order_by(func.random()).limit(min(args.requests, 10_000))).all()
+    db.close()
+    staff = auth_header("door@bench.example.com", "owner-event")
+    reqs = []
+    for _ in range(args.requests):
+        # ~10% forged codes take the bad-signature path
+        code = rnd.choice(codes) if codes and rnd.random() > 0.1 else f"{rnd.getrandbits(48):012x}.{rnd.getrandbits(64):016x}"
+        reqs.append(("POST", "/validate/ticket", {"json": {"code": code}, "headers": staff}))
+    return await drive(events, reqs)
+
+async def login(auth):
+    rnd = random.Random(13)
+    reqs = [("POST", "/auth/login", {"json": {"email": f"user{rnd.randrange(args.users)}@bench.example.com", "password": PASSWORD}})
+            for _ in range(args.requests)]
+    return await drive(auth, reqs)
+
+async def client_service(events):
+    from client_service.main import create_app as create_client_app
+    from client_service import db as mongo
+    from client_service.event_client import EventServiceClient
+    probe = mongo.connect()
+    try:
+        await asyncio.wait_for(probe.client.admin.command("ping"), 2)
+    except Exception as e:
+        return {"skipped": f"Mongo not reachable: {type(e).__name__}"}
+    finally:
+        probe.close()
+    client_app = create_client_app()
+    async with client_app.router.lifespan_context(client_app):
+        # ticket details call the event service in-process too
+        await client_app.state.event_client.aclose()
+        client_app.state.event_client = EventServiceClient("http://event", transport=httpx.ASGITransport(app=event_app))
+        db = SessionLocal()
+        codes = db.scalars(select(models.Ticket.code).limit(50 * 20)).all()
+        db.close()
+        owners = [f"client{i}@bench.example.com" for i in range(20)]
+        await client_app.state.mongo.tickets.delete_many({"email": {"$in": owners}})
+        await client_app.state.mongo.tickets.insert_many([{"email": owners[i % len(owners)], "cod": code} for i, code in enumerate(codes)])
+        rnd = random.Random(17)
+        reqs = []
+        for _ in range(args.requests):
+            i = rnd.randrange(len(codes))
+            headers = auth_header(owners[i % len(owners)], "client")
+            if rnd.random() < 0.5:
+                reqs.append(("GET", "/clients/me/tickets", {"params": {"items_per_page": 20}, "headers": headers}))
+            else:
+                reqs.append(("GET", f"/clients/me/tickets/{codes[i]}/details", {"headers": headers}))
+        async with asgi_client(client_app, "http://client") as client:
+            return await drive(client, reqs)
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+def compare(results, baseline_path) -> bool:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    ok = True
+    print(f"\nvs {baseline_path}")
+    for name, cur in results.items():
+        old = baseline.get(name)
+        if not old or "rps" not in old or "rps" not in cur:
+            continue
+        d_rps = cur["rps"] / old["rps"] - 1
+        d_p99 = cur["p99_ms"] / old["p99_ms"] - 1
+        flag = ""
+        if d_rps < -args.tolerance or d_p99 > args.tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"  {name:<8} rps {old['rps']:>9} -> {cur['rps']:<9} ({d_rps:+.0%})  p99 {old['p99_ms']:>8} -> {cur['p99_ms']:<8} ({d_p99:+.0%}){flag}")
+    return ok
+
+async def main():
+    seed()
+    scenarios = {"onsale": onsale, "browse": browse, "scan": scan, "login": login, "client": client_service}
+    results = {}
+    async with asgi_client(event_app, "http://event") as events, asgi_client(auth_app, "http://auth") as auth:
+        for name in args.scenarios.split(","):
+            if name not in scenarios:
+                parser.error(f"unknown scenario {name!r}, pick from {', '.join(SCENARIOS)}")
+            results[name] = await scenarios[name](auth if name == "login" else events)
+            r = results[name]
+            if "skipped" in r:
+                print(f"{name:<8} skipped: {r['skipped']}")
+            else:
+                print(f"{name:<8} {r['requests']:>7} req  {r['rps']:>9} req/s  p50={r['p50_ms']:>8}ms  "
+                      f"p99={r['p99_ms']:>8}ms  errors={r['errors']}" + ("  OVERSOLD" if r.get("oversold") else ""))
+    return results
+
+# guarded: the auth service hashes passwords in spawned worker processes, which re-import this file
+if __name__ == "__main__":
+    results = asyncio.run(main())
+    record = {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_rev(),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} x{os.cpu_count()}",
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "cache": os.getenv("CACHE_URL", "memory://"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("save", "baseline", "db_dir")},
+        },
+        "results": results,
+    }
+    os.makedirs(args.save, exist_ok=True)
+    out = os.path.join(args.save, f"{record['meta']['time'].replace(':', '')}-{record['meta']['git'] or 'nogit'}.json")
+    with open(out, "w") as f:
+        json.dump(record, f, indent=2)
+    print(f"saved {out}")
+
+    failed = any(r.get("oversold") for r in results.values())
+    if args.baseline and not compare(results, args.baseline):
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+# Login cost versus password hashing settings: time for one verification and
+# verifications/second for a burst through the process pool the auth service uses
+# (utils.verify_password_async), next to the legacy unsalted SHA-256.
+#
+#   python bench_password.py --burst 200 --workers 8
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--burst", type=int, default=200, help="concurrent verifications per setting")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--scrypt-n", default="4096,16384,65536", help="comma-separated scrypt N values")
+parser.add_argument("--pbkdf2", default="100000,300000,600000", help="comma-separated PBKDF2 iterations")
+args = parser.parse_args()
+
+os.environ["HASH_WORKERS"] = str(args.workers)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from auth_service import utils
+
+def settings():
+    yield "sha256 (legacy)", hashlib.sha256(b"bench-password").hexdigest()
+    for n in map(int, args.scrypt_n.split(",")):
+        utils.SCRYPT_N = n
+        yield f"scrypt n={n}", utils.hash_password("bench-password", "scrypt")
+    for iterations in map(int, args.pbkdf2.split(",")):
+        utils.PBKDF2_ITERATIONS = iterations
+        yield f"pbkdf2 i={iterations}", utils.hash_password("bench-password", "pbkdf2_sha256")
+
+async def burst(hashed: str) -> float:
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(utils.verify_password_async("bench-password", hashed) for _ in range(args.burst)))
+    assert all(results)
+    return args.burst / (time.perf_counter() - t0)
+
+async def main():
+    await burst(utils.hash_password("bench-password", "pbkdf2_sha256"))  # start the worker processes
+    print(f"{'setting':<18} {'one verify':>11} {'logins/s':>10}  (burst {args.burst}, {args.workers} workers)")
+    for name, hashed in settings():
+        t0 = time.perf_counter()
+        utils.verify_password("bench-password", hashed)
+        single = (time.perf_counter() - t0) * 1000
+        print(f"{name:<18} {single:9.2f}ms {await burst(hashed):10.0f}")
+    utils.shutdown_pool()
+
+# guarded: the pool's spawned workers re-import this file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Seeds N events into a scratch SQLite database and times the filtered queries
+# behind GET /events (the same filter code the endpoint uses).
+#
+#   python bench_search.py --events 1000000
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--events", type=int, default=1_000_000)
+parser.add_argument("--repeat", type=int, default=20)
+parser.add_argument("--db", default=None, help="reuse an existing database file")
+args = parser.parse_args()
+
+path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import insert, select, func
+from event_service.db import SessionLocal
+from event_service import models, search
+from event_service.migrate import migrate
+
+KINDS = ["Concert", "Festival", "Teatru", "Conferinta", "Opera", "Stand-up", "Expozitie", "Meci"]
+STYLES = ["rock", "jazz", "clasic", "pop", "folk", "electronic", "hip-hop", "blues"]
+CITIES = [f"Oras {i}" for i in range(500)] + ["Sala Polivalenta", "Teatrul National", "Hotel Central"]
+
+migrate()
+db = SessionLocal()
+have = db.scalar(select(func.count(models.Event.id)))
+if have < args.events:
+    rnd = random.Random(42)
+    t0 = time.perf_counter()
+    batch = 20_000
+    for start in range(have, args.events, batch):
+        rows = []
+        for i in range(start, min(start + batch, args.events)):
+            seats = rnd.randint(50, 5000)
+            rows.append({
+                "id_owner": rnd.randint(1, 5000),
+                "name": f"{rnd.choice(KINDS)} {rnd.choice(STYLES)} #{i}",
+                "location": rnd.choice(CITIES),
+                "description": f"{rnd.choice(STYLES)} {rnd.choice(KINDS).lower()} night",
+                "seats": seats,
+                "remaining": seats,
+            })
+        db.execute(insert(models.Event), rows)
+        db.commit()
+    print(f"seeded {args.events - have} events in {time.perf_counter() - t0:.1f}s ({path})")
+
+CASES = {
+    "q=rare (one row)": dict(q="#424242"),
+    "q=common": dict(q="jazz"),
+    "loc=city": dict(loc="Oras 137"),
+    "q+loc": dict(q="opera", loc="Teatrul National"),
+    "no match": dict(q="zzzz-nothing"),
+}
+
+def run(filters, like: bool):
+    if like:
+        query, key = select(models.Event), models.Event.id
+        if "q" in filters:
+            query = query.where(func.lower(models.Event.name).like(f"%{filters['q'].lower()}%"))
+        if "loc" in filters:
+            query = query.where(func.lower(models.Event.location).like(f"%{filters['loc'].lower()}%"))
+    else:
+        query, key = search.events(**filters)
+    query = query.where(models.Event.seats >= 100).order_by(key).limit(10)
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        db.execute(query).scalars().all()
+        timings.append((time.perf_counter() - t0) * 1000)
+        if like and sum(timings) > 5000:
+            break
+    return statistics.median(timings), max(timings)
+
+print(f"{'case':<20} {'fts p50':>9} {'fts max':>9} {'like p50':>10}")
+for name, filters in CASES.items():
+    fts50, ftsmax = run(filters, like=False)
+    like50, _ = run(filters, like=True)
+    print(f"{name:<20} {fts50:8.2f}ms {ftsmax:8.2f}ms {like50:9.2f}ms")
+db.close()
@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# List endpoint throughput by page size, with the default response path (ORM objects
+# validated through the response model) and with FAST_JSON (column tuples dumped by
+# orjson, see common/responses.py). Runs in-process over httpx's ASGI transport with
+# the catalog cache off, so every request queries and serializes.
+#
+#   python bench_serialize.py --events 20000 --sizes 10,100,1000
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--events", type=int, default=20_000)
+parser.add_argument("--users", type=int, default=5_000)
+parser.add_argument("--sizes", default="10,100,1000")
+parser.add_argument("--requests", type=int, default=300, help="requests per endpoint, size and mode")
+parser.add_argument("--concurrency", type=int, default=16)
+args = parser.parse_args()
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ["CACHE_URL"] = "off"
+os.environ["MAX_PAGE_SIZE"] = str(max(map(int, args.sizes.split(","))))
+os.environ["METRICS_ENABLED"] = "0"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from sqlalchemy import func, insert, select
+from common import responses
+from common.security import create_access_token
+from event_service.db import SessionLocal
+from event_service.migrate import migrate
+from event_service import models
+from event_service.main import create_app as create_event_app
+from auth_service.db import SessionLocal as AuthSessionLocal
+from auth_service.migrate import migrate as migrate_auth
+from auth_service.models import User
+from auth_service.main import create_app as create_auth_app
+
+STYLES = ["rock", "jazz", "clasic", "pop", "folk", "electronic", "hip-hop", "blues"]
+
+def seed():
+    migrate()
+    migrate_auth()
+    rnd = random.Random(42)
+    db = SessionLocal()
+    have = db.scalar(select(func.count(models.Event.id)))
+    if have < args.events:
+        db.execute(insert(models.Event), [{
+            "id_owner": 1,
+            "name": f"Concert {rnd.choice(STYLES)} #{i}",
+            "location": f"Oras {rnd.randrange(500)}",
+            "description": f"{rnd.choice(STYLES)} night",
+            "seats": 500,
+            "remaining": rnd.randint(0, 500),
+        } for i in range(have, args.events)])
+        db.commit()
+    db.close()
+    auth = AuthSessionLocal()
+    have = auth.scalar(select(func.count(User.id)))
+    if have < args.users:
+        auth.execute(insert(User), [{"email": f"user{i}@bench.example.com", "password_hash": "-", "role": "client"}
+                                    for i in range(have, args.users)])
+        auth.commit()
+    auth.close()
+
+async def run(client: httpx.AsyncClient, url: str, size: int) -> float:
+    headers = {"Authorization": f"Bearer {create_access_token('bench@bench.example.com', 'owner-event', uid=1)}"}
+    rnd = random.Random(size)
+    pages = max(1, min(args.events, args.users) // size)
+    todo = iter(range(args.requests))
+
+    async def worker():
+        for _ in todo:
+            r = await client.get(url, params={"items_per_page": size, "page": rnd.randint(1, pages)}, headers=headers)
+            r.raise_for_status()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return args.requests / (time.perf_counter() - t0)
+
+async def main():
+    seed()
+    event_app, auth_app = create_event_app(), create_auth_app()
+    endpoints = [(event_app, "/events"), (event_app, "/me/events"), (auth_app, "/users")]
+    print(f"{'endpoint':<16} {'size':>5} {'default req/s':>14} {'FAST_JSON req/s':>16} {'speedup':>8}")
+    for app, url in endpoints:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+            for size in map(int, args.sizes.split(",")):
+                rates = []
+                for fast in (False, True):
+                    responses.FAST_JSON = fast
+                    await run(client, url, size)  # warm-up
+                    rates.append(await run(client, url, size))
+                print(f"{url:<16} {size:>5} {rates[0]:>14.0f} {rates[1]:>16.0f} {rates[1] / rates[0]:>7.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,31 +5,34 @@ async def main():
     client = AsyncIOMotorClient("mongodb://localhost:27017")
     db = client["pos_client"]
     clients = db["clients"]
+    tickets = db["tickets"]
     await clients.delete_many({})
+    await tickets.delete_many({})
     docs = [
         {
             "email": "alice@example.com",
             "prenume": "Alice",
             "nume": "Popescu",
             "public": True,
-            "social": ["https://facebook.com/alice"],
-            "bilete": [
-                {"cod": "TICKET1", "tip": "eveniment", "eveniment": {"nume": "Concert Rock", "locatie": "Sala Polivalenta"}},
-                {"cod": "TICKET2", "tip": "pachet", "pachet": {"nume": "Pachet Cultura"}}
-            ]
+            "social": ["https://facebook.com/alice"]
         },
         {
             "email": "bob@example.com",
             "prenume": "Bob",
             "nume": "Ionescu",
             "public": False,
-            "social": ["https://twitter.com/bob"],
-            "bilete": [
-                {"cod": "TICKET3", "tip": "eveniment", "eveniment": {"nume": "Conferinta IT", "locatie": "Hotel Central"}}
-            ]
+            "social": ["https://twitter.com/bob"]
         }
     ]
+    await clients.create_index("email", unique=True)
     await clients.insert_many(docs)
+    await tickets.create_index([("email", 1), ("cod", 1)], unique=True)
+    await tickets.create_index([("email", 1), ("_id", 1)])
+    await tickets.insert_many([
+        {"email": "alice@example.com", "cod": "TICKET1", "tip": "eveniment", "eveniment": {"nume": "Concert Rock", "locatie": "Sala Polivalenta"}},
+        {"email": "alice@example.com", "cod": "TICKET2", "tip": "pachet", "pachet": {"nume": "Pachet Cultura"}},
+        {"email": "bob@example.com", "cod": "TICKET3", "tip": "eveniment", "eveniment": {"nume": "Conferinta IT", "locatie": "Hotel Central"}}
+    ])
     print("MongoDB filled!")
 
 if __name__ == "__main__":
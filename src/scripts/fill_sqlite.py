@@ -1,44 +1,42 @@
 import sys
 sys.path.append('..')
-from event_service.db import SessionLocal, Base, engine
+from sqlalchemy import insert
+from event_service.db import SessionLocal
 from event_service.models import Event, Package, PackageEvent, Ticket
+from event_service.inventory import rebuild_counters
+from event_service.migrate import migrate
 
-Base.metadata.create_all(bind=engine)
+migrate()
 db = SessionLocal()
 
+# one executemany INSERT per table; RETURNING gives back the ids in input order
 events = [
-    Event(id_owner=1, name="Concert Rock", location="Sala Polivalenta", description="Concert de rock", seats=100),
-    Event(id_owner=2, name="Teatru Clasic", location="Teatrul National", description="Piesa de teatru", seats=80),
-    Event(id_owner=1, name="Conferinta IT", location="Hotel Central", description="Conferinta IT", seats=150)
+    dict(id_owner=1, name="Concert Rock", location="Sala Polivalenta", description="Concert de rock", seats=100),
+    dict(id_owner=2, name="Teatru Clasic", location="Teatrul National", description="Piesa de teatru", seats=80),
+    dict(id_owner=1, name="Conferinta IT", location="Hotel Central", description="Conferinta IT", seats=150)
 ]
-for ev in events:
-    db.add(ev)
-db.commit()
+event_ids = db.scalars(insert(Event).returning(Event.id, sort_by_parameter_order=True), events).all()
 
 packages = [
-    Package(id_owner=1, name="Pachet Cultura", location="Oras", description="Teatru si conferinta", seats=70),
-    Package(id_owner=2, name="Pachet Muzica", location="Oras", description="Concert", seats=90)
+    dict(id_owner=1, name="Pachet Cultura", location="Oras", description="Teatru si conferinta", seats=70),
+    dict(id_owner=2, name="Pachet Muzica", location="Oras", description="Concert", seats=90)
 ]
-for pkg in packages:
-    db.add(pkg)
-db.commit()
+package_ids = db.scalars(insert(Package).returning(Package.id, sort_by_parameter_order=True), packages).all()
 
 # Join events to packages
-joins = [
-    PackageEvent(package_id=packages[0].id, event_id=events[1].id),
-    PackageEvent(package_id=packages[0].id, event_id=events[2].id),
-    PackageEvent(package_id=packages[1].id, event_id=events[0].id)
-]
-for j in joins:
-    db.add(j)
-db.commit()
+db.execute(insert(PackageEvent), [
+    dict(package_id=package_ids[0], event_id=event_ids[1]),
+    dict(package_id=package_ids[0], event_id=event_ids[2]),
+    dict(package_id=package_ids[1], event_id=event_ids[0])
+])
 
-tickets = [
-    Ticket(code="TICKET1", event_id=events[0].id),
-    Ticket(code="TICKET2", package_id=packages[0].id),
-    Ticket(code="TICKET3", event_id=events[2].id)
-]
-for t in tickets:
-    db.add(t)
+db.execute(insert(Ticket), [
+    dict(code="TICKET1", event_id=event_ids[0]),
+    dict(code="TICKET2", package_id=package_ids[0]),
+    dict(code="TICKET3", event_id=event_ids[2])
+])
 db.commit()
+
+# tickets were inserted directly, bring the seat counters in line
+rebuild_counters(db)
 db.close()
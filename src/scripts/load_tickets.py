@@ -0,0 +1,90 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent on-sale load test for POST /tickets.
+# Buyers race for a fixed number of seats; the run fails if more tickets are
+# issued than seats exist, and prints p50/p99 latency per slice of sold seats
+# so a growing tickets table shows up as a latency trend.
+#
+#   python load_tickets.py --seats 10000 --buyers 12000 --workers 16
+#
+# With --url the buyers hit a running service instead (e.g. run_event.py with
+# WEB_CONCURRENCY=4), which checks seat counting across worker processes.
+# DATABASE_URL must point at that service's database for the final check.
+#
+#   DATABASE_URL=postgresql://... python load_tickets.py --url http://localhost:8001
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--seats", type=int, default=10000)
+parser.add_argument("--buyers", type=int, default=12000)
+parser.add_argument("--workers", type=int, default=16)
+parser.add_argument("--slices", type=int, default=5)
+parser.add_argument("--url", default=None, help="base URL of a running event service")
+args = parser.parse_args()
+
+if args.url and "DATABASE_URL" not in os.environ:
+    parser.error("--url needs DATABASE_URL set to the service's database")
+tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/load.db")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.security import create_access_token
+from event_service.db import SessionLocal
+from event_service import models
+
+if args.url:
+    import httpx
+    client = httpx.Client(base_url=args.url, timeout=30, limits=httpx.Limits(max_connections=args.workers))
+else:
+    from fastapi.testclient import TestClient
+    from event_service.main import create_app
+    from event_service.migrate import migrate
+    migrate()
+    client = TestClient(create_app())
+owner = {"Authorization": f"Bearer {create_access_token('owner@load.test', 'owner-event', uid=1)}"}
+buyer = {"Authorization": f"Bearer {create_access_token('buyer@load.test', 'client')}"}
+
+r = client.post("/events", json={"name": f"Load {time.time()}", "seats": args.seats}, headers=owner)
+r.raise_for_status()
+event_id = r.json()["id"]
+
+def buy(_):
+    t0 = time.perf_counter()
+    resp = client.post("/tickets", json={"event_id": event_id}, headers=buyer)
+    return resp.status_code, time.perf_counter() - t0
+
+started = time.perf_counter()
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    results = list(pool.map(buy, range(args.buyers)))
+elapsed = time.perf_counter() - started
+
+ok = [lat for code, lat in results if code == 200]
+sold_out = sum(1 for code, _ in results if code == 400)
+errors = len(results) - len(ok) - sold_out
+
+db = SessionLocal()
+issued = db.query(models.Ticket).filter(models.Ticket.event_id == event_id).count()
+ev = db.get(models.Event, event_id)
+db.close()
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+print(f"buyers={args.buyers} seats={args.seats} ok={len(ok)} sold_out={sold_out} errors={errors}")
+print(f"throughput={len(results) / elapsed:.0f} req/s over {elapsed:.1f}s")
+step = max(1, len(ok) // args.slices)
+for i in range(0, len(ok), step):
+    chunk = ok[i:i + step]
+    print(f"  sold {i:>7}-{i + len(chunk):<7} p50={statistics.median(chunk) * 1000:6.2f}ms p99={pct(chunk, 0.99):6.2f}ms")
+print(f"tickets issued={issued} counter sold={ev.sold} remaining={ev.remaining}")
+
+if issued > args.seats or issued != ev.sold or len(ok) != issued:
+    print("OVERSOLD or counters out of sync")
+    sys.exit(1)
+print("no oversell")
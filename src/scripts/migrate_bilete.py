@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+# Moves tickets embedded in clients.bilete into the `tickets` collection
+# (one document per ticket). Clients are streamed in batches and each batch is
+# written with one unordered bulk upsert, so memory stays flat and the script
+# can be re-run safely after an interruption.
+
+async def main(url: str, db_name: str, batch_size: int):
+    client = AsyncIOMotorClient(url)
+    db = client[db_name]
+    clients, tickets = db["clients"], db["tickets"]
+    await tickets.create_index([("email", 1), ("cod", 1)], unique=True)
+    await tickets.create_index([("email", 1), ("_id", 1)])
+
+    moved = migrated_clients = 0
+    cursor = clients.find({"bilete.0": {"$exists": True}}, {"email": 1, "bilete": 1}).batch_size(batch_size)
+    ops, done_ids = [], []
+
+    async def flush():
+        nonlocal moved, ops, done_ids
+        if ops:
+            await tickets.bulk_write(ops, ordered=False)
+            moved += len(ops)
+        if done_ids:
+            await clients.update_many({"_id": {"$in": done_ids}}, {"$unset": {"bilete": ""}})
+        ops, done_ids = [], []
+
+    async for doc in cursor:
+        for b in doc.get("bilete", []):
+            ticket = {"email": doc["email"], "cod": b["cod"], "tip": b.get("tip"),
+                      "eveniment": b.get("eveniment"), "pachet": b.get("pachet")}
+            ops.append(UpdateOne({"email": doc["email"], "cod": b["cod"]}, {"$setOnInsert": ticket}, upsert=True))
+        done_ids.append(doc["_id"])
+        migrated_clients += 1
+        if len(ops) >= batch_size:
+            await flush()
+    await flush()
+    print(f"Moved {moved} tickets from {migrated_clients} clients")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="pos_client")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.mongo_url, args.db, args.batch))
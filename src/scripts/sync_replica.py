@@ -0,0 +1,40 @@
+import argparse
+import sqlite3
+import time
+
+# Poor man's read replica for local testing: copies a SQLite primary into one or
+# more replica files every --interval seconds (online backup, the primary keeps
+# serving), so the replicas lag the primary the way a streaming replica would.
+#
+#   python sync_replica.py ./event.db ./event-replica.db --interval 0.5
+#   DATABASE_REPLICA_URLS=sqlite:///./event-replica.db python run_event.py
+#
+# With Postgres, point DATABASE_REPLICA_URLS at a streaming replica instead.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("primary")
+parser.add_argument("replicas", nargs="+")
+parser.add_argument("--interval", type=float, default=1.0, help="seconds between copies (the simulated lag)")
+parser.add_argument("--once", action="store_true")
+args = parser.parse_args()
+
+def sync():
+    src = sqlite3.connect(args.primary)
+    try:
+        for path in args.replicas:
+            dst = sqlite3.connect(path, timeout=30)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+    finally:
+        src.close()
+
+if __name__ == "__main__":
+    while True:
+        t0 = time.perf_counter()
+        sync()
+        if args.once:
+            break
+        print(f"synced {len(args.replicas)} replica(s) in {(time.perf_counter() - t0) * 1000:.0f} ms", flush=True)
+        time.sleep(args.interval)
@@ -0,0 +1,11 @@
+import sys
+sys.path.append('..')
+from event_service.migrate import migrate, rebuild
+
+# Brings an event database created by an older version up to date:
+# seat inventory columns, secondary indexes and the full-text search tables,
+# then recomputes the seat counters from the tickets table.
+
+migrate()
+rebuild()
+print("Event DB upgraded!")
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+import pytest
+
+# the services import each other as top-level packages (`common`, `event_service`, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HASH_WORKERS", "0")
+os.environ.setdefault("CACHE_URL", "off")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from auth_service.main import create_app as create_auth_app  # noqa: E402
+from common.security import create_access_token  # noqa: E402
+from common.settings import Settings  # noqa: E402
+from event_service.db import Database  # noqa: E402
+from event_service.main import create_app as create_event_app  # noqa: E402
+from event_service.migrate import migrate  # noqa: E402
+
+@pytest.fixture
+def auth():
+    # auth(sub, role, uid) -> request headers carrying a fresh access token
+    def headers(sub: str, role: str, uid=None) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(sub, role, uid=uid)}"}
+    return headers
+
+@pytest.fixture
+def owner(auth):
+    return auth("owner@example.com", "owner-event", 1)
+
+@pytest.fixture
+def admin(auth):
+    return auth("admin@example.com", "admin", 3)
+
+@pytest.fixture
+def buyer(auth):
+    return auth("buyer@example.com", "client", 4)
+
+@pytest.fixture
+def make_event_app(tmp_path):
+    # a file database (not :memory:): the event service reads through a second, async engine
+    def make(name: str = "event.db", **settings):
+        return create_event_app(Settings(database_url=f"sqlite:///{tmp_path / name}", migrate=True, metrics=False, **settings))
+    return make
+
+@pytest.fixture
+def event_app(make_event_app):
+    return make_event_app()
+
+@pytest.fixture
+def event_client(event_app):
+    with TestClient(event_app) as client:
+        yield client
+
+@pytest.fixture
+def auth_client(tmp_path):
+    app = create_auth_app(Settings(database_url=f"sqlite:///{tmp_path / 'auth.db'}", migrate=True, metrics=False))
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def event_db(tmp_path):
+    # a migrated event database without an app, for testing modules directly
+    database = Database(f"sqlite:///{tmp_path / 'event.db'}")
+    migrate(database.engine)
+    yield database
+    asyncio.run(database.dispose())
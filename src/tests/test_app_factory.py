@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+EVENT = {"name": "Concert", "location": "Cluj", "description": "jazz", "seats": 5}
+
+def test_apps_in_one_process_share_nothing(make_event_app, owner, tmp_path):
+    a, b = make_event_app("a.db"), make_event_app("b.db")
+    with TestClient(a) as client_a, TestClient(b) as client_b:
+        assert client_a.post("/events", json=EVENT, headers=owner).status_code == 200
+        assert len(client_a.get("/events", headers=owner).json()) == 1
+        assert client_b.get("/events", headers=owner).json() == []
+    assert (tmp_path / "a.db").exists()
+
+def test_closing_one_app_leaves_the_other_working(make_event_app, owner):
+    a, b = make_event_app("a.db"), make_event_app("b.db")
+    with TestClient(b) as client_b:
+        with TestClient(a) as client_a:
+            client_a.get("/events", headers=owner)
+        assert client_b.post("/events", json=EVENT, headers=owner).status_code == 200
+        assert len(client_b.get("/events", headers=owner).json()) == 1
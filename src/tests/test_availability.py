@@ -0,0 +1,66 @@
+import asyncio
+import json
+import pytest
+from event_service import availability, inventory, models
+
+@pytest.fixture
+def database(event_db):
+    with event_db.SessionLocal() as db:
+        db.add(models.Event(id=1, id_owner=1, name="Concert", seats=5, remaining=5))
+        db.commit()
+    return event_db
+
+def test_unknown_ids_are_rejected_and_not_watched(database):
+    broadcaster = availability.Broadcaster(database)
+
+    async def subscribe():
+        with pytest.raises(availability.UnknownIds) as e:
+            await broadcaster.subscribe({("event", 1), ("event", 99)})
+        return e.value.keys
+
+    assert asyncio.run(subscribe()) == [("event", 99)]
+    assert broadcaster.watchers == {}
+
+def test_failed_snapshot_leaves_no_watcher(database):
+    broadcaster = availability.Broadcaster(database)
+
+    async def failing_fetch(keys):
+        raise ConnectionError("database down")
+    broadcaster._fetch = failing_fetch
+    with pytest.raises(ConnectionError):
+        asyncio.run(broadcaster.subscribe({("event", 1)}))
+    assert broadcaster.watchers == {}
+
+def messages(chunk: bytes):
+    return [json.loads(line[len(b"data: "):]) for line in chunk.splitlines() if line.startswith(b"data: ")]
+
+def test_snapshot_then_coalesced_deltas(database, monkeypatch):
+    monkeypatch.setattr(availability, "POLL_MS", 0)  # deltas come from notify() only
+    broadcaster = availability.Broadcaster(database)
+
+    def buy(n):
+        with database.SessionLocal() as db:
+            for _ in range(n):
+                inventory.reserve(db, 1, None)
+            db.commit()
+        broadcaster.notify("event", 1)
+
+    async def scenario():
+        sub = await broadcaster.subscribe({("event", 1)})
+        snapshot = await sub.next(1)
+        buy(1)
+        buy(2)  # before the next tick: the subscriber only gets the latest value
+        delta = await sub.next(1)
+        quiet = await sub.next(0.05)
+        broadcaster.unsubscribe(sub)
+        return snapshot, delta, quiet
+
+    snapshot, delta, quiet = asyncio.run(scenario())
+    assert messages(snapshot) == [{"type": "event", "id": 1, "available_tickets": 5}]
+    assert messages(delta) == [{"type": "event", "id": 1, "available_tickets": 2}]
+    assert quiet == b": ping\n\n"
+    assert broadcaster.watchers == {}
+
+def test_stream_endpoint_rejects_bad_ids(event_client, owner):
+    assert event_client.get("/availability/stream", headers=owner).status_code == 400
+    assert event_client.get("/availability/stream", params={"events": "123"}, headers=owner).status_code == 404
@@ -0,0 +1,22 @@
+def names(client, headers, **params):
+    return [e["name"] for e in client.get("/events", params=params, headers=headers).json()]
+
+def test_filter_and_sort_follow_purchases_and_refunds(event_client, owner, buyer):
+    client = event_client
+    ids = {}
+    for name, seats in (("Small", 2), ("Large", 5), ("Open", None)):
+        ids[name] = client.post("/events", json={"name": name, "seats": seats}, headers=owner).json()["id"]
+    assert names(client, owner, available_tickets=2) == ["Small", "Large"]  # unlimited has no count to compare
+    codes = [client.post("/tickets", json={"event_id": ids["Large"]}, headers=buyer).json()["code"] for _ in range(4)]
+    assert names(client, owner, available_tickets=2) == ["Small"]
+    assert names(client, owner, sort="available_tickets") == ["Large", "Small"]
+    assert names(client, owner, sort="-available_tickets") == ["Small", "Large"]
+    client.delete(f"/tickets/{codes[0]}", headers=owner)
+    rows = {e["name"]: e["available_tickets"] for e in client.get("/events", headers=owner).json()}
+    assert rows == {"Small": 2, "Large": 2, "Open": None}
+
+def test_sold_out_event_refuses_purchases(event_client, owner, buyer):
+    event_id = event_client.post("/events", json={"name": "Tiny", "seats": 1}, headers=owner).json()["id"]
+    assert event_client.post("/tickets", json={"event_id": event_id}, headers=buyer).status_code == 200
+    assert event_client.post("/tickets", json={"event_id": event_id}, headers=buyer).status_code == 400
+    assert names(event_client, owner, available_tickets=1) == []
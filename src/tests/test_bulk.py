@@ -0,0 +1,44 @@
+import json
+from event_service import bulk
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+CSV = {"Content-Type": "text/csv"}
+
+def availability(client, headers):
+    return {e["name"]: e["available_tickets"] for e in client.get("/me/events", headers=headers).json()}
+
+def test_batch_purchase_is_all_or_nothing(event_client, owner, buyer):
+    client = event_client
+    a = client.post("/events", json={"name": "A", "seats": 10}, headers=owner).json()["id"]
+    b = client.post("/events", json={"name": "B", "seats": 3}, headers=owner).json()["id"]
+    too_many = [{"event_id": a, "quantity": 2}, {"event_id": b, "quantity": 5}]
+    assert client.post("/tickets/batch", json={"items": too_many}, headers=buyer).status_code == 400
+    assert availability(client, owner) == {"A": 10, "B": 3}
+    r = client.post("/tickets/batch", json={"items": [{"event_id": a, "quantity": 2}, {"event_id": b, "quantity": 3}]}, headers=buyer)
+    assert r.status_code == 200 and [t["event_id"] for t in r.json()] == [a, a, b, b, b]
+    codes = [t["code"] for t in r.json()]
+    assert set(client.post("/validate/tickets", json={"codes": codes}, headers=buyer).json()["results"].values()) == {True}
+    assert availability(client, owner) == {"A": 8, "B": 0}
+
+def test_ndjson_event_import_and_csv_package_import(event_client, owner):
+    client = event_client
+    body = "\n".join(json.dumps({"name": f"Imported {i}", "location": "Iasi", "seats": 20 + i}) for i in range(5)) + "\n"
+    assert client.post("/events/import", content=body, headers={**owner, **NDJSON}).json() == {"imported": 5}
+    events = client.get("/me/events", headers=owner).json()
+    assert [(e["name"], e["available_tickets"]) for e in events] == [(f"Imported {i}", 20 + i) for i in range(5)]
+    first, second = events[0]["id"], events[1]["id"]
+    csv_body = f"name,seats,event_ids\nWeekend,15,{first};{second}\nSolo,,\n"
+    assert client.post("/packages/import", content=csv_body, headers={**owner, **CSV}).json() == {"imported": 2}
+    packages = client.get("/event-packets", params={"embed": "events"}, headers=owner).json()
+    assert {p["name"]: sorted(e["id"] for e in p["events"]) for p in packages} == {"Weekend": [first, second], "Solo": []}
+
+def test_import_reports_the_bad_line_and_keeps_earlier_chunks(event_client, owner, monkeypatch):
+    monkeypatch.setattr(bulk, "CHUNK_SIZE", 2)
+    client = event_client
+    bad = '{"name": "X1"}\n{"name": "X2"}\n{"seats": 3}\n'
+    r = client.post("/events/import", content=bad, headers={**owner, **NDJSON})
+    assert r.status_code == 400 and r.json()["detail"].startswith("line 3:")
+    duplicate = '{"name": "Y1"}\n{"name": "Y2"}\n{"name": "Y1"}\n'
+    r = client.post("/events/import", content=duplicate, headers={**owner, **NDJSON})
+    assert r.status_code == 400 and "(2 imported before)" in r.json()["detail"]
+    assert sorted(availability(client, owner)) == ["X1", "X2", "Y1", "Y2"]
@@ -0,0 +1,33 @@
+import pytest
+from event_service import models
+from event_service.cache import MemoryCache, ResponseCache
+
+@pytest.fixture
+def cached_app(event_app):
+    # the suite runs with CACHE_URL=off; this app gets a per-process memory cache
+    event_app.state.services.catalog_cache = ResponseCache(MemoryCache())
+    return event_app
+
+def names(response):
+    return [e["name"] for e in response.json()]
+
+def test_etag_gives_304_until_the_catalog_changes(cached_app, event_client, owner):
+    event_client.post("/events", json={"name": "First", "seats": 5}, headers=owner)
+    r = event_client.get("/events", headers=owner)
+    etag = r.headers["ETag"]
+    assert names(r) == ["First"]
+    assert event_client.get("/events", headers={**owner, "If-None-Match": etag}).status_code == 304
+    event_client.post("/events", json={"name": "Second", "seats": 5}, headers=owner)
+    r = event_client.get("/events", headers={**owner, "If-None-Match": etag})
+    assert r.status_code == 200 and names(r) == ["First", "Second"] and r.headers["ETag"] != etag
+
+def test_pages_come_from_the_cache_until_a_write_invalidates_them(cached_app, event_client, owner, buyer):
+    first = event_client.post("/events", json={"name": "First", "seats": 5}, headers=owner).json()
+    assert names(event_client.get("/events", headers=owner)) == ["First"]
+    with cached_app.state.services.db.SessionLocal() as db:  # behind the API's back: no invalidation
+        db.add(models.Event(id_owner=1, name="Hidden", seats=5, remaining=5))
+        db.commit()
+    assert names(event_client.get("/events", headers=owner)) == ["First"]
+    assert names(event_client.get("/events", params={"loc": ""}, headers=owner)) == ["First"]  # same normalized key
+    event_client.put(f"/events/{first['id']}", json={"name": "First", "seats": 6}, headers=owner)
+    assert names(event_client.get("/events", headers=owner)) == ["First", "Hidden"]
@@ -0,0 +1,36 @@
+import pytest
+from common import responses
+
+def fetch(client, monkeypatch, fast, path, headers, params):
+    monkeypatch.setattr(responses, "FAST_JSON", fast)
+    r = client.get(path, params=params, headers=headers)
+    assert r.status_code == 200
+    # key order too: FAST_JSON labels its columns in response field order
+    return [list(row.items()) for row in r.json()], r.headers.get("X-Next-Cursor")
+
+@pytest.fixture
+def catalog(event_client, owner):
+    a = event_client.post("/events", json={"name": "Concert în Cluj", "location": "Cluj", "seats": 5}, headers=owner).json()
+    event_client.post("/events", json={"name": "Open air", "description": None}, headers=owner)
+    for i in range(3):
+        event_client.post("/packages", json={"name": f"Pass {i}", "seats": 5, "event_ids": [a["id"]]}, headers=owner)
+
+@pytest.mark.parametrize("path, params", [
+    ("/events", {}),
+    ("/events", {"items_per_page": 1}),
+    ("/events", {"sort": "-available_tickets"}),
+    ("/me/events", {}),
+    ("/event-packets", {"items_per_page": 2}),
+    ("/event-packets", {"embed": "events"}),
+    ("/me/event-packets", {}),
+])
+def test_event_lists_are_the_same_either_way(event_client, owner, catalog, monkeypatch, path, params):
+    default = fetch(event_client, monkeypatch, False, path, owner, params)
+    assert default[0]
+    assert fetch(event_client, monkeypatch, True, path, owner, params) == default
+
+def test_user_list_is_the_same_either_way(auth_client, admin, monkeypatch):
+    for i in range(3):
+        auth_client.post("/users", json={"email": f"u{i}@example.com", "password": "secret123", "role": "client"})
+    default = fetch(auth_client, monkeypatch, False, "/users", admin, {"items_per_page": 2})
+    assert fetch(auth_client, monkeypatch, True, "/users", admin, {"items_per_page": 2}) == default
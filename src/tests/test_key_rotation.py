@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def run(code, **env):
+    # one process per key configuration, as a restart with new settings would be
+    environ = {k: v for k, v in os.environ.items() if k not in ("JWT_KEYS", "JWT_ACTIVE_KID", "JWT_SECRET_RETIRED")}
+    result = subprocess.run([sys.executable, "-c", "from common import security as s\n" + code],
+                            env={**environ, **env}, cwd=SRC, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+SIGN = "print(s.create_access_token('alice@example.com', 'client', uid=1))"
+
+def verify(token):
+    return f"""
+try:
+    print(s.verify_token({token!r})["sub"])
+except s.TokenInvalid as e:
+    print(e)
+"""
+
+def test_first_rotation_keeps_existing_tokens_valid():
+    before = run(SIGN)  # JWT_SECRET only
+    rotated = {"JWT_KEYS": "k2:s2", "JWT_ACTIVE_KID": "k2"}
+    assert run(verify(before), **rotated) == "alice@example.com"
+    after = run(SIGN, **rotated)
+    assert run(verify(after), **rotated) == "alice@example.com"
+    retired = {**rotated, "JWT_SECRET_RETIRED": "1"}
+    assert run(verify(after), **retired) == "alice@example.com"
+    assert run(verify(before), **retired) == "Unknown signing key"
+
+def test_tokens_from_the_default_kid_still_verify():
+    secret = run("print(s.SECRET_KEY)")
+    old = run(SIGN, JWT_KEYS=f"default:{secret}")
+    assert run(verify(old), JWT_KEYS="k2:s2") == "alice@example.com"
@@ -0,0 +1,28 @@
+from sqlalchemy import func, select
+from event_service import models
+
+def test_embed_returns_each_package_with_its_events(event_client, owner):
+    client = event_client
+    a = client.post("/events", json={"name": "A", "seats": 10}, headers=owner).json()
+    b = client.post("/events", json={"name": "B", "seats": 8}, headers=owner).json()
+    client.post("/packages", json={"name": "Both", "seats": 8, "event_ids": [a["id"], b["id"]]}, headers=owner)
+    client.post("/packages", json={"name": "Only A", "seats": 4, "event_ids": [a["id"]]}, headers=owner)
+    plain = client.get("/event-packets", headers=owner).json()
+    assert [p["name"] for p in plain] == ["Both", "Only A"] and "events" not in plain[0]
+    embedded = client.get("/event-packets", params={"embed": "events"}, headers=owner).json()
+    assert {p["name"]: sorted(e["name"] for e in p["events"]) for p in embedded} == {"Both": ["A", "B"], "Only A": ["A"]}
+    assert embedded[0]["events"][0] == a
+    of_a = client.get(f"/events/{a['id']}/event-packets", params={"embed": "events"}, headers=owner).json()
+    assert sorted(p["name"] for p in of_a) == ["Both", "Only A"]
+    assert [e["name"] for e in client.get(f"/event-packets/{embedded[1]['id']}/events", headers=owner).json()] == ["A"]
+
+def test_rejected_packages_leave_nothing_behind(event_app, event_client, owner):
+    client = event_client
+    a = client.post("/events", json={"name": "A", "seats": 10}, headers=owner).json()["id"]
+    assert client.post("/packages", json={"name": "P", "seats": 5, "event_ids": [a, 999]}, headers=owner).status_code == 400
+    assert client.post("/packages", json={"name": "P", "seats": 11, "event_ids": [a]}, headers=owner).status_code == 400
+    assert client.post("/packages", json={"name": "P", "seats": 5, "event_ids": [a]}, headers=owner).status_code == 200
+    assert client.post("/packages", json={"name": "P", "seats": 5, "event_ids": [a]}, headers=owner).status_code == 400
+    with event_app.state.services.db.SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(models.Package)) == 1
+        assert db.scalar(select(func.count()).select_from(models.PackageEvent)) == 1
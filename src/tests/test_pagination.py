@@ -0,0 +1,43 @@
+import pytest
+from common.pagination import NEXT_CURSOR_HEADER
+
+def crawl(client, path, headers, **params):
+    # follows X-Next-Cursor to the end; returns the ids in the order served
+    ids, cursor = [], None
+    while True:
+        r = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert r.status_code == 200
+        ids += [row["id"] for row in r.json()]
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+
+@pytest.fixture
+def catalog(event_client, owner):
+    # 23 events; seats repeat so sorting on availability has ties to break by id
+    return [event_client.post("/events", json={"name": f"Event {i}", "seats": 10 + i % 4}, headers=owner).json() for i in range(23)]
+
+def test_cursor_crawl_visits_every_event_once_in_id_order(event_client, owner, catalog):
+    ids = crawl(event_client, "/events", owner, items_per_page=5)
+    assert ids == sorted(e["id"] for e in catalog)
+    assert crawl(event_client, "/me/events", owner, items_per_page=7) == ids
+
+def test_cursor_crawl_of_packages(event_client, owner):
+    made = [event_client.post("/packages", json={"name": f"Pass {i}", "seats": 5}, headers=owner).json()["id"] for i in range(11)]
+    assert crawl(event_client, "/event-packets", owner, items_per_page=3) == made
+
+@pytest.mark.parametrize("sort", ["available_tickets", "-available_tickets"])
+def test_cursor_crawl_by_availability(event_client, owner, buyer, catalog, sort):
+    event_client.post("/tickets", json={"event_id": catalog[0]["id"]}, headers=buyer)
+    left = {e["id"]: e["seats"] for e in catalog}
+    left[catalog[0]["id"]] -= 1
+    descending = sort.startswith("-")
+    expected = sorted(left, key=lambda i: (-left[i] if descending else left[i], i))
+    assert crawl(event_client, "/events", owner, items_per_page=4, sort=sort) == expected
+
+def test_page_parameter_still_works(event_client, owner, catalog):
+    r = event_client.get("/events", params={"page": 2, "items_per_page": 5}, headers=owner)
+    assert [e["id"] for e in r.json()] == sorted(e["id"] for e in catalog)[5:10]
+
+def test_bad_cursor_is_rejected(event_client, owner, catalog):
+    assert event_client.get("/events", params={"cursor": "not-a-cursor"}, headers=owner).status_code == 400
@@ -0,0 +1,41 @@
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def replicated(make_event_app, tmp_path):
+    primary, replica = tmp_path / "event.db", tmp_path / "replica.db"
+
+    def sync():
+        # what scripts/sync_replica.py does: copy the primary into the replica file
+        src, dst = sqlite3.connect(primary), sqlite3.connect(replica)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
+
+    return make_event_app(replica_urls=[f"sqlite:///{replica}"]), sync
+
+def test_catalog_reads_come_from_the_replica_except_for_the_writer(replicated, auth, owner):
+    app, sync = replicated
+    reader = auth("reader@example.com", "client", 9)
+    with TestClient(app) as client:
+        sync()  # the replica starts with the migrated, empty schema
+        client.post("/events", json={"name": "Concert", "seats": 5}, headers=owner)
+        assert client.get("/events", headers=reader).json() == []  # replica, not synced yet
+        assert [e["name"] for e in client.get("/events", headers=owner).json()] == ["Concert"]  # pinned to the primary
+        sync()
+        assert [e["name"] for e in client.get("/events", headers=reader).json()] == ["Concert"]
+
+def test_ticket_lookup_falls_back_to_the_primary(replicated, auth, owner, buyer):
+    app, sync = replicated
+    checker = auth("checker@example.com", "client", 9)
+    with TestClient(app) as client:
+        event_id = client.post("/events", json={"name": "Concert", "seats": 5}, headers=owner).json()["id"]
+        sync()
+        code = client.post("/tickets", json={"event_id": event_id}, headers=buyer).json()["code"]
+        r = client.get(f"/events/{event_id}/tickets/{code}", headers=checker)  # missing on the replica
+        assert r.status_code == 200 and r.json()["code"] == code
+        assert client.get(f"/events/{event_id}/tickets/nope", headers=checker).status_code == 404
+        assert client.post("/validate/ticket", json={"code": code}, headers=checker).json() == {"valid": True}
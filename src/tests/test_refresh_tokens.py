@@ -0,0 +1,34 @@
+import pytest
+
+@pytest.fixture
+def login(auth_client):
+    auth_client.post("/users", json={"email": "ana@example.com", "password": "secret123", "role": "client"})
+    def tokens():
+        r = auth_client.post("/auth/login", json={"email": "ana@example.com", "password": "secret123"})
+        assert r.status_code == 200
+        return r.json()
+    return tokens
+
+def refresh(client, token):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+def test_each_refresh_token_works_once(auth_client, login):
+    first = login()["refresh_token"]
+    r = refresh(auth_client, first)
+    assert r.status_code == 200
+    second = r.json()["refresh_token"]
+    assert second != first and r.json()["access_token"]
+    assert refresh(auth_client, second).status_code == 200
+
+def test_replay_revokes_the_whole_login_only(auth_client, login):
+    stolen, other_device = login()["refresh_token"], login()["refresh_token"]
+    rotated = refresh(auth_client, stolen).json()["refresh_token"]
+    assert refresh(auth_client, stolen).status_code == 401  # replay
+    assert refresh(auth_client, rotated).status_code == 401  # the rest of that login goes with it
+    assert refresh(auth_client, other_device).status_code == 200
+
+def test_logout_and_token_types(auth_client, login):
+    pair = login()
+    assert refresh(auth_client, pair["access_token"]).status_code == 401
+    assert auth_client.post("/auth/logout", json={"refresh_token": pair["refresh_token"]}).json() == {"ok": True}
+    assert refresh(auth_client, pair["refresh_token"]).status_code == 401
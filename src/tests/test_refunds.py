@@ -0,0 +1,9 @@
+def test_only_the_seller_or_an_admin_refunds(event_client, auth, owner, admin, buyer):
+    client = event_client
+    other_owner = auth("other@example.com", "owner-event", 2)
+    event = client.post("/events", json={"name": "Concert", "location": "Cluj", "description": "jazz", "seats": 5}, headers=owner).json()
+    codes = [client.post("/tickets", json={"event_id": event["id"]}, headers=buyer).json()["code"] for _ in range(2)]
+    assert client.delete(f"/tickets/{codes[0]}", headers=other_owner).status_code == 403
+    assert client.post("/validate/ticket", json={"code": codes[0]}, headers=buyer).json() == {"valid": True}
+    assert client.delete(f"/tickets/{codes[0]}", headers=owner).status_code == 200
+    assert client.delete(f"/tickets/{codes[1]}", headers=admin).status_code == 200
@@ -0,0 +1,51 @@
+import asyncio
+from event_service import models
+from event_service.validation import RevocationSet
+
+def revoke(database, seq, code):
+    with database.SessionLocal() as db:
+        db.add(models.RevokedTicket(seq=seq, code=code))
+        db.commit()
+
+def test_refresh_picks_up_refunds_that_commit_out_of_seq_order(event_db):
+    database = event_db
+    revoked = RevocationSet()
+
+    async def refresh():
+        revoked._next_refresh = 0.0
+        async with database.AsyncSessionLocal() as db:
+            await revoked.refresh(db)
+
+    async def scenario():
+        revoke(database, 2, "b")
+        await refresh()
+        revoke(database, 1, "a")  # took its seq first, committed last
+        await refresh()
+        await refresh()
+
+    asyncio.run(scenario())
+    assert revoked.might_contain("a") and revoked.might_contain("b")
+    assert (revoked.last_seq, revoked.bloom.count) == (2, 2)
+
+def test_local_refunds_are_counted_once(event_db):
+    database = event_db
+    revoked = RevocationSet()
+
+    async def scenario():
+        revoke(database, 1, "a")
+        revoked.add("a")  # the refund's own worker, right after its commit
+        async with database.AsyncSessionLocal() as db:
+            await revoked.refresh(db)
+
+    asyncio.run(scenario())
+    assert revoked.might_contain("a") and revoked.bloom.count == 1 and not revoked._local
+
+def test_feed_repeats_the_overlap_and_keeps_advancing(event_app, event_client, buyer):
+    database = event_app.state.services.db
+    revoke(database, 2, "b")
+    first = event_client.get("/validate/revocations", headers=buyer).json()
+    assert first == {"codes": ["b"], "last_seq": 2}
+    revoke(database, 1, "a")
+    revoke(database, 3, "c")
+    again = event_client.get("/validate/revocations", params={"since": 2, "limit": 1}, headers=buyer).json()
+    assert again == {"codes": ["a", "b", "c"], "last_seq": 3}
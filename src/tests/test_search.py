@@ -0,0 +1,19 @@
+import asyncio
+import pytest
+from event_service import models, search
+
+@pytest.fixture
+def catalog(event_db):
+    with event_db.SessionLocal() as db:
+        for i, (name, location) in enumerate([("Jazz Night", "Cluj-Napoca"), ("Rock Fest", "Iasi"), ("jazz brunch", "Cluj")], 1):
+            db.add(models.Event(id=i, id_owner=1, name=name, location=location))
+        db.commit()
+    return event_db
+
+@pytest.mark.parametrize("q, loc, expected", [("jazz", None, [1, 3]), ("AZZ", "cluj", [1, 3]), ("ja", None, [1, 3]), (None, "iasi", [2])])
+def test_fts_and_like_find_the_same_events(catalog, q, loc, expected):
+    async def ids(fts):
+        query, key = search.events(q=q, loc=loc, fts=fts)
+        async with catalog.AsyncSessionLocal() as db:
+            return list(await db.scalars(query.order_by(key).with_only_columns(models.Event.id)))
+    assert asyncio.run(ids(True)) == asyncio.run(ids(False)) == expected
@@ -0,0 +1,27 @@
+from event_service import inventory, models
+
+def test_seat_edit_checks_the_row_not_the_loaded_object(event_db):
+    database = event_db
+    with database.SessionLocal() as db:
+        db.add(models.Event(id=1, id_owner=1, name="Concert", seats=5, remaining=5))
+        db.commit()
+    with database.SessionLocal() as editor, database.SessionLocal() as buyer:
+        assert editor.get(models.Event, 1).sold == 0  # the editor saw no sales...
+        inventory.reserve(buyer, 1, None)
+        buyer.commit()  # ...but a purchase lands before its UPDATE
+        assert not inventory.update_seats(editor, models.Event, 1, {"seats": 10})
+        assert inventory.update_seats(editor, models.Event, 1, {"name": "Concert!", "seats": 5})
+        editor.commit()
+        ev = editor.get(models.Event, 1)
+        editor.refresh(ev)
+        assert (ev.seats, ev.sold, ev.remaining) == (5, 1, 4)
+
+def test_update_event_keeps_remaining_in_step_with_sales(event_client, owner, buyer):
+    client = event_client
+    body = {"name": "Concert", "location": "Cluj", "description": "jazz", "seats": 5}
+    event = client.post("/events", json=body, headers=owner).json()
+    client.post("/tickets", json={"event_id": event["id"]}, headers=buyer)
+    assert client.put(f"/events/{event['id']}", json={**body, "seats": 6}, headers=owner).status_code == 400
+    r = client.put(f"/events/{event['id']}", json={**body, "description": "blues"}, headers=owner)
+    assert r.status_code == 200 and r.json()["available_tickets"] == 4
+    assert client.put("/events/999", json=body, headers=owner).status_code == 404
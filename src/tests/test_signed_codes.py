@@ -0,0 +1,26 @@
+import pytest
+from common.security import create_access_token, sign_code, verify_signed_code
+
+def forged_code(token: str) -> str:
+    # header.payload plus the first CODE_SIG_LEN chars of the token's HMAC
+    head, _, sig = token.rpartition(".")
+    return f"{head}.{sig[:16]}"
+
+def test_signed_code_roundtrip():
+    code = sign_code("0123456789ab")
+    assert verify_signed_code(code) == "0123456789ab"
+    assert verify_signed_code(code[:-1] + ("A" if code[-1] != "A" else "B")) is None
+
+def test_sign_code_rejects_other_values():
+    with pytest.raises(ValueError):
+        sign_code("not-a-ticket")
+
+def test_access_token_is_not_a_ticket_code():
+    token = create_access_token("mallory@example.com", "client", uid=7)
+    assert verify_signed_code(forged_code(token)) is None
+
+def test_forged_code_does_not_validate(event_client):
+    token = create_access_token("mallory@example.com", "client", uid=7)
+    r = event_client.post("/validate/ticket", json={"code": forged_code(token)}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert r.json() == {"valid": False}
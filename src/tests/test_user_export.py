@@ -0,0 +1,17 @@
+def add_users(client, n):
+    for i in range(n):
+        client.post("/users", json={"email": f"u{i}@example.com", "password": "secret123", "role": "client"})
+
+def test_only_admins_export_users(auth_client, admin, buyer):
+    add_users(auth_client, 1)
+    assert auth_client.get("/users/export").status_code == 401
+    assert auth_client.get("/users/export", headers=buyer).status_code == 403
+    r = auth_client.get("/users/export", headers=admin)
+    assert r.status_code == 200 and '"email": "u0@example.com"' in r.text
+
+def test_only_admins_list_users(auth_client, admin, buyer):
+    add_users(auth_client, 3)
+    assert auth_client.get("/users").status_code == 401
+    assert auth_client.get("/users", headers=buyer).status_code == 403
+    r = auth_client.get("/users", params={"items_per_page": 2}, headers=admin)
+    assert r.status_code == 200 and len(r.json()) == 2 and r.headers["X-Next-Cursor"]
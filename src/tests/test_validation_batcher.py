@@ -0,0 +1,26 @@
+import asyncio
+from client_service.event_client import ValidationBatcher
+
+def test_batches_in_flight_are_held_until_done():
+    sent = []
+
+    async def send(codes):
+        await asyncio.sleep(0.01)
+        sent.append(sorted(codes))
+        return {code: code == "good" for code in codes}
+
+    async def scenario():
+        batcher = ValidationBatcher(send, window_ms=1)
+        results = asyncio.gather(batcher.validate("good"), batcher.validate("bad"), batcher.validate("good"))
+        await asyncio.sleep(0.005)
+        assert len(batcher._tasks) == 1  # flushed, the bulk call is still running
+        assert await results == [True, False, True]
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+        pending = asyncio.ensure_future(batcher.validate("good"))
+        await asyncio.sleep(0)
+        await batcher.drain()  # sends the open window without waiting for its timer
+        assert pending.done() and pending.result() is True
+
+    asyncio.run(scenario())
+    assert sent == [["bad", "good"], ["good"]]
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+import httpx
+from common.security import verify_token
+
+@pytest.fixture
+def alice(auth):
+    return auth("alice@example.com", "client", 2)
+
+@pytest.fixture
+def bob(auth):
+    return auth("bob@example.com", "client", 3)
+
+def setup(client, owner, rate, name="Concert", seats=50):
+    event = client.post("/events", json={"name": name, "location": "Cluj", "description": "jazz", "seats": seats}, headers=owner).json()
+    assert client.put(f"/events/{event['id']}/waiting-room", json={"rate": rate}, headers=owner).status_code == 200
+    return event["id"]
+
+def test_joining_again_returns_the_same_place(event_client, owner, alice, bob):
+    client = event_client
+    event_id = setup(client, owner, rate=2)
+    joins = [client.post(f"/events/{event_id}/queue", headers=alice).json() for _ in range(4)]
+    assert len({j["admit_at"] for j in joins}) == 1
+    assert len({verify_token(j["admission_token"], typ="admission")["jti"] for j in joins}) == 1
+    later = client.post(f"/events/{event_id}/queue", headers=bob).json()
+    assert later["admit_at"] == pytest.approx(joins[0]["admit_at"] + 0.5)  # Alice's repeats did not push Bob back
+
+async def _concurrent_joins(app, event_id, headers, n):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://event") as client:
+        rs = await asyncio.gather(*(client.post(f"/events/{event_id}/queue", headers=headers) for _ in range(n)))
+    return [r.json() for r in rs]
+
+def test_concurrent_joins_take_one_slot(event_app, event_client, owner, alice):
+    event_id = setup(event_client, owner, rate=2)
+    joins = event_client.portal.call(_concurrent_joins, event_app, event_id, alice, 8)
+    assert len({j["admit_at"] for j in joins}) == 1
+
+def test_spent_admission_gives_a_new_place(event_client, owner, alice):
+    client = event_client
+    event_id = setup(client, owner, rate=1000)
+    first = client.post(f"/events/{event_id}/queue", headers=alice).json()
+    buy = client.post("/tickets", json={"event_id": event_id}, headers={**alice, "X-Admission-Token": first["admission_token"]})
+    assert buy.status_code == 200
+    again = client.post(f"/events/{event_id}/queue", headers=alice).json()
+    assert again["admit_at"] > first["admit_at"]
+
+def test_admission_for_one_event_does_not_open_another(event_client, owner, alice):
+    client = event_client
+    quiet = setup(client, owner, rate=1000, name="Quiet")
+    hot = setup(client, owner, rate=1, name="Hot", seats=200)
+    token = client.post(f"/events/{quiet}/queue", headers=alice).json()["admission_token"]
+    items = [{"event_id": quiet, "quantity": 1}, {"event_id": hot, "quantity": 100}]
+    r = client.post("/tickets/batch", json={"items": items}, headers={**alice, "X-Admission-Token": token})
+    assert r.status_code == 403
+    assert {e["id"]: e["available_tickets"] for e in client.get("/me/events", headers=owner).json()}[hot] == 200
+    assert client.post("/tickets", json={"event_id": quiet}, headers={**alice, "X-Admission-Token": token}).status_code == 200